@@ -1,21 +1,364 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from datetime import datetime, timedelta
+import os
+import threading
+import time
 import uuid
-import random
 import json
-from werkzeug.security import generate_password_hash, check_password_hash
+import hmac
+from itertools import islice
 
-from tamilnadu_workers_6types import providers as initial_providers
+from catalog import ProviderCatalog, SnapshotCatalog, SORT_KEYS
+from geo import provider_coordinates
+from availability import AvailabilityCalendar, AvailabilityError, SlotTaken, parse_date
+from stats import StatsCounters
+from booking_index import CustomerBookingIndex, ProviderBookingIndex, TrackingIndex
+from status_engine import StatusEngine
+from live_updates import LiveUpdates
+from storage import open_storage
+from concurrency import StripedLock
+from passwords import HasherBusy, PasswordHasher
+from response_cache import ResponseCache
+from json_provider import FastJSONProvider
+from compression import compress_response
+from metrics import RequestMetrics
+from snapshot import open_snapshot
+from records import Booking, BookingStatus
+from bulk import (BATCH_SIZE, CSV, MAX_ERRORS, MIMETYPES, BulkError, batched, input_format, output_format,
+                  read_records, write_csv, write_ndjson)
+from pagination import PaginationError, decode_cursor, encode_cursor, parse_fields, parse_limit, project
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here-change-in-production'
+app.json = FastJSONProvider(app)  # orjson when installed, stdlib otherwise
+app.after_request(compress_response)  # gzip/brotli for clients that accept it
+# Per-route counters and latency histograms for /metrics. SERVICEHUB_PROFILING=1 lets
+# a request sent with "X-Profile: 1" be stack-sampled, see /metrics/profiles/<id>.
+request_metrics = RequestMetrics(profiling=os.environ.get("SERVICEHUB_PROFILING") == "1")
+request_metrics.install(app)
 
-# In-memory databases (replace with SQLite/MySQL in production)
+# Durable backend: SERVICEHUB_STORAGE=memory (default) or sqlite:///path/to/servicehub.db,
+# with ?shared=1 when several worker processes serve the same database (see server.py)
+storage = open_storage(os.environ.get("SERVICEHUB_STORAGE", "memory"))
+
+# In-memory working set and indexes, filled from storage by load_state()
 bookings = {}
 booking_statuses = {}
+booking_log = []  # Booking ids in creation order, positions never move
 registered_users = {}  # email: user_data
 registered_providers_list = []  # List of provider dictionaries
-providers = initial_providers.copy()  # Start with initial providers
+# SERVICEHUB_SNAPSHOT=path serves the bundled providers from a snapshot built with
+# snapshot.py, mapped and shared by every worker instead of imported by each
+provider_snapshot = open_snapshot(os.environ.get("SERVICEHUB_SNAPSHOT"))
+# Indexed by id, category, location and rating
+providers = SnapshotCatalog(provider_snapshot) if provider_snapshot else ProviderCatalog()
+stats_counters = StatsCounters()  # Running totals for /api/stats
+provider_bookings_index = ProviderBookingIndex()  # providerId: bookings and dashboard aggregates
+customer_bookings_index = CustomerBookingIndex()  # customerId: booking ids, for /my-bookings
+# trackingId: booking id; shared deployments draw tracking numbers from storage
+tracking_index = TrackingIndex(sequence=storage.next_value if storage.shared else None)
+# Rendered catalog responses, invalidated whenever the catalog version moves.
+# SERVICEHUB_CACHE=0 turns it off, SERVICEHUB_CACHE_MB caps its size.
+response_cache = ResponseCache(max_bytes=int(os.environ.get("SERVICEHUB_CACHE_MB", 32)) * 1024 * 1024,
+                               max_age=int(os.environ.get("SERVICEHUB_CACHE_MAX_AGE", 0)),
+                               enabled=os.environ.get("SERVICEHUB_CACHE", "1") != "0")
+# Booked time slots per provider and day; shared deployments also claim slots in storage
+availability = AvailabilityCalendar(claim=storage.claim_slot if storage.shared else None,
+                                    release=storage.release_slot if storage.shared else None)
+change_seq = 0  # Last storage change applied by this process
+sync_lock = threading.Lock()
+sync_thread = None  # Background replay of other workers' changes, see start_sync()
+SYNC_INTERVAL_SECONDS = 0.5
+# Password hashing runs on a bounded pool so a burst of logins cannot tie up every
+# request thread. SERVICEHUB_PASSWORD_METHOD sets the werkzeug method and work factor
+# (e.g. scrypt:65536:8:1); stored hashes made with older settings are upgraded on login.
+password_hasher = PasswordHasher(
+    method=os.environ.get("SERVICEHUB_PASSWORD_METHOD", "scrypt"),
+    workers=int(os.environ.get("SERVICEHUB_HASH_WORKERS", 0)) or None,
+    max_pending=int(os.environ["SERVICEHUB_HASH_QUEUE"]) if "SERVICEHUB_HASH_QUEUE" in os.environ else None,
+    processes=os.environ.get("SERVICEHUB_HASH_POOL") == "process",
+)
+request_metrics.store("bookings", lambda: len(bookings))
+request_metrics.store("booking_statuses", lambda: len(booking_statuses))
+request_metrics.store("providers", lambda: len(providers))
+request_metrics.store("registered_users", lambda: len(registered_users))
+request_metrics.store("response_cache", lambda: len(response_cache))
+# The bulk import/export routes are for operators and need "Authorization: Bearer
+# <SERVICEHUB_ADMIN_TOKEN>"; without the variable they refuse every request
+admin_token = os.environ.get("SERVICEHUB_ADMIN_TOKEN")
+# Serializes changes to one booking across request threads and the status engine.
+# Do not call into status_engine while holding one of these.
+booking_locks = StripedLock()
+
+
+def set_booking_status(booking, status):
+    # Single place where a booking's status changes, so the aggregates follow it.
+    # Callers hold booking_locks(booking["id"]).
+    stats_counters.record_booking_status(booking["status"], status)
+    provider_bookings_index.status_changed(booking, booking["status"], status)
+    booking["status"] = status
+
+
+def complete_booking(booking_id):
+    with booking_locks(booking_id):
+        if booking_id in bookings:
+            set_booking_status(bookings[booking_id], "Completed")
+            storage.save_booking(bookings[booking_id], booking_statuses.get(booking_id))
+
+
+def booking_status_changed(booking_id, status_info):
+    storage.save_status(booking_id, status_info)
+    live_updates.publish(booking_id, status_info)
+
+
+# Pushes status deltas to /track/.../stream watchers
+live_updates = LiveUpdates()
+
+# Moves active bookings through their statuses on a background tick; with
+# shared storage only the process holding the lead lock ticks
+status_engine = StatusEngine(booking_statuses, on_complete=complete_booking, on_change=booking_status_changed,
+                             should_run=storage.try_lead, lock_for=booking_locks)
+
+
+def server_error(e):
+    request_metrics.record_error(e)
+    return jsonify({"success": False, "message": str(e)}), 500
+
+
+def hasher_busy_response():
+    response = jsonify({"success": False, "message": "Server busy, please try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def admin_authorized():
+    supplied = request.headers.get("Authorization", "").encode()
+    return bool(admin_token) and hmac.compare_digest(supplied, f"Bearer {admin_token}".encode())
+
+
+def new_provider(provider_id, data):
+    return {
+        "id": provider_id,
+        "name": data.get("name"),
+        "category": data.get("category"),
+        "avatar": data.get("avatar", "🔧"),
+        "rating": 5.0,
+        "reviews": 0,
+        "services": data.get("services", []),
+        "priceRange": data.get("hourlyRate", "₹500") + "/hour",
+        "verified": False,
+        "location": data.get("location"),
+        "experience": data.get("experience", "0 years"),
+        "description": data.get("description", ""),
+        "phone": data.get("phone"),
+        "email": data.get("email"),
+        "licenseNumber": data.get("licenseNumber", ""),
+        "insuranceStatus": data.get("insuranceStatus", "none"),
+        "workingDays": data.get("workingDays", []),
+        "workingHours": data.get("workingHours", {}),
+        "serviceRadius": data.get("serviceRadius", "10 km"),
+        "coordinates": data.get("coordinates"),  # {"lat", "lng"}, else the city centre is used
+        "registrationDate": datetime.now().isoformat()
+    }
+
+
+def new_provider_user(provider, password_hash):
+    return {
+        "id": str(provider["id"]),
+        "email": provider["email"],
+        "password": password_hash,
+        "name": provider["name"],
+        "phone": provider["phone"],
+        "userType": "provider",
+        "providerId": provider["id"],
+        "createdAt": datetime.now().isoformat()
+    }
+
+
+def new_booking_id():
+    # 40 random bits, re-drawn on the rare clash with an existing booking
+    while True:
+        booking_id = "BK" + uuid.uuid4().hex[:10].upper()
+        if booking_id not in bookings:
+            return booking_id
+
+
+def public_booking(booking, **extra):
+    # customerId is the session user's internal id: it stays server-side, for the
+    # customer index and the admin export, out of anything tracking ids can reach
+    data = booking.to_dict()
+    data.pop("customerId", None)
+    data.update(extra)
+    return data
+
+
+def index_booking(booking, status_info):
+    booking_id = booking["id"]
+    with booking_locks(booking_id):
+        # The status goes in first and the bookings entry last, so any reader
+        # that finds the booking also finds its status
+        if status_info is not None:
+            booking_statuses[booking_id] = status_info
+        tracking_index.add(booking["trackingId"], booking_id)
+        provider_bookings_index.add(booking)
+        customer_bookings_index.add(booking)
+        stats_counters.record_booking_status(None, booking["status"])
+        bookings[booking_id] = booking
+        booking_log.append(booking_id)
+    if status_info is not None and status_info["status"] not in ("completed", "cancelled"):
+        status_engine.schedule(booking_id)
+
+
+def clear_local_bookings():
+    status_engine.clear()
+    bookings.clear()
+    booking_statuses.clear()
+    booking_log.clear()
+    stats_counters.clear_bookings()
+    provider_bookings_index.clear()
+    customer_bookings_index.clear()
+    tracking_index.clear()
+    availability.clear()
+
+
+def load_state():
+    """Fill the in-memory indexes from storage, seeding it with the bundled providers on first run.
+
+    With a snapshot the bundled providers are not copied into storage, which
+    then only holds registered providers and changes to bundled ones.
+    """
+    global change_seq
+    # Read the change log position first; replaying overlapping changes is harmless
+    change_seq = storage.last_change()
+    bundled = ()
+    if provider_snapshot is None:
+        from tamilnadu_workers_6types import providers as bundled
+        storage.seed_providers(bundled)
+    
+    apply_providers(storage.load_providers())
+    # A database first served from a snapshot was never seeded with these
+    providers.add_many(provider for provider in bundled if provider["id"] not in providers)
+    
+    for user in storage.load_users():
+        apply_user(user)
+    
+    clear_local_bookings()
+    for booking, status_info in storage.load_bookings():
+        apply_booking(booking, status_info)
+
+
+def apply_provider(provider):
+    if provider["id"] in providers:
+        providers.update(provider["id"], provider)
+        return
+    providers.add(provider)
+    if "registrationDate" in provider:
+        registered_providers_list.append(provider)
+
+
+def apply_providers(records):
+    # Like apply_provider for each record, but new providers go into the catalog as one batch
+    added = []
+    for provider in records:
+        if provider["id"] in providers:
+            providers.update(provider["id"], provider)
+        else:
+            added.append(provider)
+    providers.add_many(added)
+    registered_providers_list.extend(provider for provider in added if "registrationDate" in provider)
+
+
+def apply_user(user):
+    if user["email"] not in registered_users:
+        stats_counters.record_user(user["userType"])
+    registered_users[user["email"]] = user
+
+
+def apply_booking(booking, status_info):
+    # Older versions of /my-bookings attached statusInfo to stored bookings
+    booking.pop("statusInfo", None)
+    existing = bookings.get(booking["id"])
+    if existing is None:
+        booking = Booking.of(booking)
+        index_booking(booking, BookingStatus.of(status_info))
+        tracking_index.observe(booking["trackingId"])
+        availability.sync(booking)
+        return
+    with booking_locks(booking["id"]):
+        set_booking_status(existing, booking["status"])
+        provider_bookings_index.date_changed(existing, existing["date"], booking["date"])
+        existing.update(booking)
+        availability.sync(existing)
+    if status_info is not None:
+        apply_status(booking["id"], status_info)
+
+
+def apply_status(booking_id, status_info):
+    with booking_locks(booking_id):
+        current = booking_statuses.get(booking_id)
+        if current is None:
+            booking_statuses[booking_id] = current = BookingStatus.of(status_info)
+        else:
+            # Update in place, the status engine and stream channels hold this dict
+            current.update(status_info)
+    if current["status"] in ("completed", "cancelled"):
+        status_engine.cancel(booking_id)
+    elif booking_id not in status_engine:
+        status_engine.schedule(booking_id)
+    live_updates.publish(booking_id, current)
+
+
+def sync_state():
+    """Apply writes made by other worker processes since the last sync."""
+    global change_seq
+    with sync_lock:
+        change_seq, changes = storage.changes_since(change_seq)
+        for kind, record in changes:
+            if kind == "provider":
+                apply_provider(record)
+            elif kind == "user":
+                apply_user(record)
+            elif kind == "booking":
+                apply_booking(record["booking"], record["statusInfo"])
+            elif kind == "status" and record["bookingId"] in bookings:
+                apply_status(record["bookingId"], record["statusInfo"])
+            elif kind == "clear":
+                clear_local_bookings()
+            elif kind == "reload":
+                load_state()
+
+
+def start_sync(interval=SYNC_INTERVAL_SECONDS):
+    """With shared storage, also replay other workers' changes on a background thread.
+
+    Requests sync before they run, but the status engine ticks in one worker
+    only; without this, live tracking streams served by another worker would
+    get no delta until some unrelated request reached it.
+    """
+    global sync_thread
+    if not storage.shared or sync_thread is not None:
+        return
+    
+    def follow():
+        while True:
+            time.sleep(interval)
+            try:
+                sync_state()
+            except Exception:
+                app.logger.exception("Replaying shared changes failed")
+    
+    sync_thread = threading.Thread(target=follow, name="change-sync", daemon=True)
+    sync_thread.start()
+
+
+load_state()
+
+
+@app.before_request
+def sync_shared_state():
+    if storage.shared:
+        sync_state()
+
 
 @app.route("/")
 def home():
@@ -33,11 +376,17 @@ def register_customer():
         if email in registered_users:
             return jsonify({"success": False, "message": "Email already registered"}), 400
         
-        # Store user data (in production, hash the password)
+        password_hash = password_hasher.hash(data.get("password"))
+        
+        # Other workers only see this process's users after a sync, storage arbitrates
+        claim = uuid.uuid4().hex
+        if not storage.claim_email(email, claim):
+            return jsonify({"success": False, "message": "Email already registered"}), 400
+        
         user_data = {
             "id": str(uuid.uuid4()),
             "email": email,
-            "password": generate_password_hash(data.get("password")),
+            "password": password_hash,
             "name": data.get("name"),
             "phone": data.get("phone"),
             "location": data.get("location"),
@@ -45,7 +394,12 @@ def register_customer():
             "createdAt": datetime.now().isoformat()
         }
         
-        registered_users[email] = user_data
+        # setdefault claims the email atomically when two signups race
+        if registered_users.setdefault(email, user_data) is not user_data:
+            storage.release_email(email, claim)
+            return jsonify({"success": False, "message": "Email already registered"}), 400
+        stats_counters.record_user("customer")
+        storage.save_user(user_data)
         
         return jsonify({
             "success": True,
@@ -58,8 +412,11 @@ def register_customer():
             }
         }), 201
         
+    except HasherBusy:
+        return hasher_busy_response()
+    
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/api/register/provider", methods=["POST"])
@@ -72,50 +429,35 @@ def register_provider():
         if email in registered_users:
             return jsonify({"success": False, "message": "Email already registered"}), 400
         
-        # Generate unique provider ID
-        provider_id = len(providers) + 1
+        password_hash = password_hasher.hash(data.get("password"))
         
-        # Create provider data
-        provider_data = {
-            "id": provider_id,
-            "name": data.get("name"),
-            "category": data.get("category"),
-            "avatar": data.get("avatar", "🔧"),
-            "rating": 5.0,
-            "reviews": 0,
-            "services": data.get("services", []),
-            "priceRange": data.get("hourlyRate", "₹500") + "/hour",
-            "verified": False,
-            "location": data.get("location"),
-            "experience": data.get("experience", "0 years"),
-            "description": data.get("description", ""),
-            "phone": data.get("phone"),
-            "email": email,
-            "licenseNumber": data.get("licenseNumber", ""),
-            "insuranceStatus": data.get("insuranceStatus", "none"),
-            "workingDays": data.get("workingDays", []),
-            "workingHours": data.get("workingHours", {}),
-            "serviceRadius": data.get("serviceRadius", "10 km"),
-            "registrationDate": datetime.now().isoformat()
-        }
+        # Other workers only see this process's users after a sync, storage arbitrates
+        claim = uuid.uuid4().hex
+        if not storage.claim_email(email, claim):
+            return jsonify({"success": False, "message": "Email already registered"}), 400
         
-        # Add to providers list
-        providers.append(provider_data)
-        registered_providers_list.append(provider_data)
+        try:
+            # Generate unique provider ID
+            provider_id = storage.next_value("provider_id", start=providers.max_id() + 1)
+        except BaseException:
+            storage.release_email(email, claim)
+            raise
         
-        # Store user credentials
-        user_data = {
-            "id": str(provider_id),
-            "email": email,
-            "password": generate_password_hash(data.get("password")),
-            "name": data.get("name"),
-            "phone": data.get("phone"),
-            "userType": "provider",
-            "providerId": provider_id,
-            "createdAt": datetime.now().isoformat()
-        }
+        # Create provider data and login credentials
+        provider_data = new_provider(provider_id, data)
+        user_data = new_provider_user(provider_data, password_hash)
+        
+        # setdefault claims the email atomically when two signups race
+        if registered_users.setdefault(email, user_data) is not user_data:
+            storage.release_email(email, claim)
+            return jsonify({"success": False, "message": "Email already registered"}), 400
+        stats_counters.record_user("provider")
         
-        registered_users[email] = user_data
+        # Add to provider catalog
+        providers.add(provider_data)
+        registered_providers_list.append(provider_data)
+        storage.save_provider(provider_data)
+        storage.save_user(user_data)
         
         return jsonify({
             "success": True,
@@ -129,8 +471,11 @@ def register_provider():
             }
         }), 201
         
+    except HasherBusy:
+        return hasher_busy_response()
+    
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/api/login", methods=["POST"])
@@ -148,8 +493,13 @@ def login():
         user = registered_users[email]
         
         # Verify password
-        if not check_password_hash(user["password"], password):
+        matches, new_hash = password_hasher.verify(user["password"], password)
+        if not matches:
             return jsonify({"success": False, "message": "Invalid credentials"}), 401
+        if new_hash is not None:
+            # Stored with an older work factor, upgrade it now that we know the password
+            user["password"] = new_hash
+            storage.save_user(user)
         
         # Check if user type matches
         if user["userType"] != user_type:
@@ -170,7 +520,7 @@ def login():
         
         # If provider, include provider details
         if user_type == "provider" and "providerId" in user:
-            provider = next((p for p in providers if p["id"] == user["providerId"]), None)
+            provider = providers.get(user["providerId"])
             if provider:
                 user_response["provider"] = provider
         
@@ -180,8 +530,11 @@ def login():
             "user": user_response
         }), 200
         
+    except HasherBusy:
+        return hasher_busy_response()
+    
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/api/logout", methods=["POST"])
@@ -213,29 +566,133 @@ def get_current_user():
 # ===== PROVIDER ROUTES =====
 
 @app.route("/providers", methods=["GET"])
+@response_cache.cached(lambda: providers.version)
 def get_providers():
     category = request.args.get("category")
     location = request.args.get("location")
     rating = request.args.get("rating")
     
-    filtered_providers = providers
+    sort = request.args.get("sort", "id")
     
-    if category:
-        filtered_providers = [p for p in filtered_providers if p["category"] == category]
+    try:
+        min_rating = float(rating) if rating else None
+        if sort not in SORT_KEYS:
+            raise PaginationError("sort must be one of: " + ", ".join(SORT_KEYS))
+        fields = parse_fields(request.args.get("fields"))
+        
+        # Without limit/cursor keep returning the plain list for existing clients
+        paginated = "limit" in request.args or "cursor" in request.args
+        limit = parse_limit(request.args.get("limit")) if paginated else None
+        cursor = request.args.get("cursor")
+        after = decode_cursor(cursor, sort) if cursor else None
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     
-    if location:
-        filtered_providers = [p for p in filtered_providers if p["location"] == location]
+    page, last_key = providers.page(category=category, location=location, min_rating=min_rating,
+                                    sort=sort, after=after, limit=limit)
+    page = [project(p, fields) for p in page]
     
-    if rating:
-        min_rating = float(rating)
-        filtered_providers = [p for p in filtered_providers if p["rating"] >= min_rating]
+    if not paginated:
+        return jsonify(page)
     
-    return jsonify(filtered_providers)
+    return jsonify({
+        "success": True,
+        "providers": page,
+        "nextCursor": encode_cursor(sort, last_key) if last_key else None
+    }), 200
+
+
+@app.route("/providers/nearby", methods=["GET"])
+def get_nearby_providers():
+    """Providers whose service radius covers lat/lng, nearest and best rated first."""
+    try:
+        lat = float(request.args["lat"])
+        lng = float(request.args["lng"])
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("lat/lng out of range")
+        radius = float(request.args["radius"]) if request.args.get("radius") else None
+        limit = parse_limit(request.args.get("limit"))
+        fields = parse_fields(request.args.get("fields"))
+    except KeyError:
+        return jsonify({"success": False, "message": "lat and lng are required"}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    results = providers.nearby(lat, lng, radius=radius, limit=limit, category=request.args.get("category"))
+    
+    return jsonify({
+        "success": True,
+        "providers": [dict(project(p, fields), distanceKm=round(distance, 2)) for p, distance in results]
+    }), 200
+
+
+@app.route("/providers/search", methods=["GET"])
+def search_providers():
+    """Free-text search over provider names, services, descriptions and towns, typos allowed."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"success": False, "message": "q is required"}), 400
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    results = providers.search(query, limit=limit, category=request.args.get("category"),
+                               location=request.args.get("location"))
+    
+    return jsonify({
+        "success": True,
+        "providers": [dict(project(p, fields), score=round(score, 3)) for p, score in results]
+    }), 200
+
+
+@app.route("/providers/next-slots", methods=["GET"])
+def get_next_slots():
+    """First free slot for each of ``ids`` (comma separated), for the listing page."""
+    try:
+        provider_ids = [int(part) for part in request.args.get("ids", "").split(",") if part.strip()]
+        if not provider_ids:
+            raise ValueError("ids is required")
+        if len(provider_ids) > 100:
+            raise ValueError("At most 100 ids per request")
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    now = datetime.now()
+    next_slots = {}
+    for provider_id in provider_ids:
+        provider = providers.get(provider_id)
+        found = availability.next_free(provider, now) if provider else None
+        next_slots[str(provider_id)] = {"date": found[0], "time": found[1]} if found else None
+    
+    return jsonify({"success": True, "nextSlots": next_slots}), 200
+
+
+@app.route("/providers/<int:provider_id>/slots", methods=["GET"])
+def get_provider_slots(provider_id):
+    provider = providers.get(provider_id)
+    if not provider:
+        return jsonify({"success": False, "message": "Provider not found"}), 404
+    
+    try:
+        day = parse_date(request.args.get("date") or datetime.now().date().isoformat())
+    except AvailabilityError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    return jsonify({
+        "success": True,
+        "providerId": provider_id,
+        "date": day.isoformat(),
+        "slotMinutes": availability.slot_minutes,
+        "slots": availability.free_slots(provider, day)
+    }), 200
 
 
 @app.route("/providers/<int:provider_id>", methods=["GET"])
+@response_cache.cached(lambda: providers.version)
 def get_provider(provider_id):
-    provider = next((p for p in providers if p["id"] == provider_id), None)
+    provider = providers.get(provider_id)
     
     if not provider:
         return jsonify({"success": False, "message": "Provider not found"}), 404
@@ -251,55 +708,51 @@ def update_provider(provider_id):
             return jsonify({"success": False, "message": "Unauthorized"}), 401
         
         data = request.json
-        provider = next((p for p in providers if p["id"] == provider_id), None)
+        provider = providers.get(provider_id)
         
         if not provider:
             return jsonify({"success": False, "message": "Provider not found"}), 404
         
         # Update provider data
         updatable_fields = ["description", "services", "priceRange", "workingDays", 
-                           "workingHours", "serviceRadius", "phone"]
+                           "workingHours", "serviceRadius", "phone", "coordinates"]
         
-        for field in updatable_fields:
-            if field in data:
-                provider[field] = data[field]
+        changes = {field: data[field] for field in updatable_fields if field in data}
+        provider = providers.update(provider_id, changes)
+        storage.save_provider(provider)
         
         return jsonify({"success": True, "message": "Provider updated successfully", "provider": provider}), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/api/provider/dashboard/<int:provider_id>", methods=["GET"])
 def provider_dashboard(provider_id):
     try:
-        # Get provider's bookings
-        provider_bookings = [b for b in bookings.values() if b.get("providerId") == provider_id]
-        
-        # Calculate stats
-        today = datetime.now().date()
-        today_bookings = len([b for b in provider_bookings if datetime.strptime(b["date"], "%Y-%m-%d").date() == today])
-        
-        completed_bookings = [b for b in provider_bookings if b["status"] == "Completed"]
-        total_earnings = sum([float(b["price"].replace("$", "").replace("₹", "")) for b in completed_bookings])
+        # Aggregates are maintained as bookings change, see ProviderBookingIndex
+        entry = provider_bookings_index.get(provider_id)
+        today = datetime.now().strftime("%Y-%m-%d")
         
         # Get recent bookings (last 5)
-        recent_bookings = sorted(provider_bookings, key=lambda x: x["createdAt"], reverse=True)[:5]
+        recent_bookings = [public_booking(booking)
+                           for booking in map(bookings.get, provider_bookings_index.recent_ids(provider_id))
+                           if booking is not None]
         
         return jsonify({
             "success": True,
             "stats": {
-                "todayBookings": today_bookings,
-                "totalBookings": len(provider_bookings),
-                "completedBookings": len(completed_bookings),
-                "totalEarnings": total_earnings,
-                "averageRating": next((p["rating"] for p in providers if p["id"] == provider_id), 5.0)
+                "todayBookings": entry.per_day.get(today, 0) if entry else 0,
+                "totalBookings": len(entry.booking_ids) if entry else 0,
+                "completedBookings": entry.completed if entry else 0,
+                "totalEarnings": entry.earnings if entry else 0,
+                "averageRating": (providers.get(provider_id) or {}).get("rating", 5.0)
             },
             "recentBookings": recent_bookings
         }), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 # ===== BOOKING ROUTES =====
@@ -308,75 +761,112 @@ def provider_dashboard(provider_id):
 def book_service():
     try:
         data = request.json
-        booking_id = "BK" + str(uuid.uuid4().hex[:6]).upper()
+        booking_id = new_booking_id()
 
         provider_id = data.get("providerId")
-        provider = next((p for p in providers if p["id"] == provider_id), None)
+        provider = providers.get(provider_id)
         
         if not provider:
             return jsonify({"success": False, "message": "Provider not found"}), 404
 
-        # Generate tracking ID
-        tracking_id = f"SH{datetime.now().strftime('%y%m%d')}{random.randint(100, 999)}"
-
-        booking = {
-            "id": booking_id,
-            "trackingId": tracking_id,
-            "providerId": provider_id,
-            "providerName": provider["name"],
-            "serviceType": data.get("serviceType"),
-            "date": data.get("date"),
-            "time": data.get("time"),
-            "description": data.get("description"),
-            "phone": data.get("phone"),
-            "location": provider["location"],
-            "price": provider["priceRange"].split(" - ")[0] if " - " in provider["priceRange"] else provider["priceRange"].split("/")[0],
-            "status": "Confirmed",
-            "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        # Take the time slot first so two customers can never get the same one
+        try:
+            availability.reserve(provider, booking_id, data.get("date"), data.get("time"))
+        except SlotTaken as e:
+            return jsonify({"success": False, "message": str(e)}), 409
+        except AvailabilityError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
 
-        bookings[booking_id] = booking
-        
-        # Initialize booking status
-        booking_statuses[booking_id] = {
-            "status": "confirmed",
-            "progress": 10,
-            "providerLocation": {
-                "lat": 13.0827 if provider["location"] == "Chennai" else 11.0168,
-                "lng": 80.2707 if provider["location"] == "Chennai" else 76.9558
-            },
-            "eta": "45 minutes",
-            "lastUpdated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        try:
+            # Generate tracking ID
+            tracking_id = tracking_index.next_id(datetime.now())
+
+            booking = Booking({
+                "id": booking_id,
+                "trackingId": tracking_id,
+                "providerId": provider_id,
+                "providerName": provider["name"],
+                "serviceType": data.get("serviceType"),
+                "date": data.get("date"),
+                "time": data.get("time"),
+                "description": data.get("description"),
+                "phone": data.get("phone"),
+                "location": provider["location"],
+                "price": provider["priceRange"].split(" - ")[0] if " - " in provider["priceRange"] else provider["priceRange"].split("/")[0],
+                "status": "Confirmed",
+                "customerId": session.get("user_id"),
+                "createdAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+
+            # Initialize booking status
+            lat, lng = provider_coordinates(provider) or (11.0168, 76.9558)
+            status_info = BookingStatus({
+                "status": "confirmed",
+                "progress": 10,
+                "providerLocation": {"lat": lat, "lng": lng},
+                "eta": "45 minutes",
+                "lastUpdated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            
+            index_booking(booking, status_info)
+        except BaseException:
+            # The booking never made it in, so give its slot back
+            availability.release(booking_id)
+            raise
+        storage.save_booking(booking, status_info)
         
         return jsonify({
             "success": True, 
             "bookingId": booking_id, 
-            "booking": booking,
+            "booking": public_booking(booking),
             "trackingId": tracking_id
         }), 201
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/my-bookings", methods=["GET"])
 def my_bookings():
     try:
-        # Convert bookings to list and reverse to show newest first
-        bookings_list = list(bookings.values())
-        bookings_list.reverse()
+        if "user_id" not in session:
+            return jsonify({"success": False, "message": "Unauthorized"}), 401
+        customer_id = session["user_id"]
+        total = customer_bookings_index.count(customer_id)
         
-        # Add status information to each booking
-        for booking in bookings_list:
-            booking_id = booking["id"]
-            if booking_id in booking_statuses:
-                booking["statusInfo"] = booking_statuses[booking_id]
+        try:
+            fields = parse_fields(request.args.get("fields"))
+            paginated = "limit" in request.args or "cursor" in request.args
+            limit = parse_limit(request.args.get("limit")) if paginated else total
+            cursor = request.args.get("cursor")
+            # The cursor is the position in this customer's history of the last booking served
+            end = decode_cursor(cursor, "createdAt")[0] if cursor else total
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
         
-        return jsonify(bookings_list), 200
+        # Walk the history backwards to show newest first
+        end = max(0, min(end, total))
+        start = max(0, end - limit)
+        bookings_list = []
+        for booking_id in reversed(customer_bookings_index.booking_ids(customer_id, start, end)):
+            booking = bookings.get(booking_id)
+            if booking is None:
+                continue
+            # Copy rather than attach statusInfo to the stored booking
+            booking = public_booking(booking, statusInfo=booking_statuses.get(booking_id))
+            bookings_list.append(project(booking, fields))
+        
+        if not paginated:
+            return jsonify(bookings_list), 200
+        
+        return jsonify({
+            "success": True,
+            "bookings": bookings_list,
+            "nextCursor": encode_cursor("createdAt", (start,)) if start > 0 else None
+        }), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/track/<booking_id>", methods=["GET"])
@@ -387,68 +877,83 @@ def track_service(booking_id):
             status_info = booking_statuses.get(booking_id, {})
             return jsonify({
                 "success": True, 
-                "booking": booking,
+                "booking": public_booking(booking),
                 "statusInfo": status_info
             }), 200
         else:
             return jsonify({"success": False, "message": "Booking not found"}), 404
             
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/track/by-tracking-id/<tracking_id>", methods=["GET"])
 def track_by_tracking_id(tracking_id):
     try:
         # Find booking by tracking ID
-        booking = next((b for b in bookings.values() if b.get("trackingId") == tracking_id), None)
+        booking = bookings.get(tracking_index.get(tracking_id))
         
         if booking:
             booking_id = booking["id"]
             status_info = booking_statuses.get(booking_id, {})
             return jsonify({
                 "success": True, 
-                "booking": booking,
+                "booking": public_booking(booking),
                 "statusInfo": status_info
             }), 200
         else:
             return jsonify({"success": False, "message": "Booking not found"}), 404
             
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
+
+
+def status_stream_response(booking_id):
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
+    
+    stream = live_updates.stream(booking_id, booking_statuses.get(booking_id, {}), last_event_id)
+    return Response(stream_with_context(stream), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.route("/track/<booking_id>/stream", methods=["GET"])
+def stream_booking_status(booking_id):
+    if booking_id not in bookings:
+        return jsonify({"success": False, "message": "Booking not found"}), 404
+    
+    return status_stream_response(booking_id)
+
+
+@app.route("/track/by-tracking-id/<tracking_id>/stream", methods=["GET"])
+def stream_booking_status_by_tracking_id(tracking_id):
+    booking_id = tracking_index.get(tracking_id)
+    if booking_id not in bookings:
+        return jsonify({"success": False, "message": "Booking not found"}), 404
+    
+    return status_stream_response(booking_id)
 
 
 @app.route("/update-booking-status", methods=["POST"])
 def update_booking_status():
     try:
-        for booking_id, status_info in booking_statuses.items():
-            if status_info["status"] not in ["completed", "cancelled"]:
-                # Simulate progress
-                if status_info["progress"] < 100:
-                    status_info["progress"] += random.randint(5, 15)
-                    status_info["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    # Update status based on progress
-                    if status_info["progress"] >= 100:
-                        status_info["status"] = "completed"
-                        status_info["eta"] = "Service completed"
-                        if booking_id in bookings:
-                            bookings[booking_id]["status"] = "Completed"
-                    elif status_info["progress"] >= 70:
-                        status_info["status"] = "in-progress"
-                        status_info["eta"] = "15 minutes remaining"
-                    elif status_info["progress"] >= 40:
-                        status_info["status"] = "en-route"
-                        # Simulate moving closer
-                        if status_info.get("providerLocation"):
-                            status_info["providerLocation"]["lat"] += (random.random() - 0.5) * 0.001
-                            status_info["providerLocation"]["lng"] += (random.random() - 0.5) * 0.001
-                        status_info["eta"] = "20 minutes"
-        
-        return jsonify({"success": True, "message": "Booking statuses updated"}), 200
+        # The status engine advances bookings on its own tick; this forces one
+        # step for every active booking, ignoring finished ones entirely
+        advanced = status_engine.advance_all()
+        
+        return jsonify({
+            "success": True,
+            "message": "Booking statuses updated",
+            "advanced": advanced,
+            "active": len(status_engine)
+        }), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/reschedule/<booking_id>", methods=["POST"])
@@ -460,21 +965,46 @@ def reschedule_booking(booking_id):
         if not booking:
             return jsonify({"success": False, "message": "Booking not found"}), 404
         
-        # Update booking details
-        booking["date"] = data.get("date", booking["date"])
-        booking["time"] = data.get("time", booking["time"])
+        with booking_locks(booking_id):
+            # Finished bookings stay finished; moving one would take a new slot and restart its tracking
+            if booking["status"] in ("Cancelled", "Completed"):
+                return jsonify({"success": False,
+                                "message": f"Booking is {booking['status'].lower()} and cannot be rescheduled"}), 409
+            
+            # Move to the new slot before touching the booking; the old slot
+            # is only given up once the new one is secured
+            new_date = data.get("date", booking["date"])
+            provider = providers.get(booking["providerId"])
+            if provider:
+                try:
+                    availability.reserve(provider, booking_id, new_date, data.get("time", booking["time"]))
+                except SlotTaken as e:
+                    return jsonify({"success": False, "message": str(e)}), 409
+                except AvailabilityError as e:
+                    return jsonify({"success": False, "message": str(e)}), 400
+            
+            # Update booking details
+            provider_bookings_index.date_changed(booking, booking["date"], new_date)
+            booking["date"] = new_date
+            booking["time"] = data.get("time", booking["time"])
+            
+            # Update status
+            if booking_id in booking_statuses:
+                booking_statuses[booking_id]["status"] = "confirmed"
+                booking_statuses[booking_id]["progress"] = 10
+                booking_statuses[booking_id]["eta"] = "Rescheduled - 45 minutes"
+                booking_statuses[booking_id]["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                live_updates.publish(booking_id, booking_statuses[booking_id])
+            
+            storage.save_booking(booking, booking_statuses.get(booking_id))
         
-        # Update status
         if booking_id in booking_statuses:
-            booking_statuses[booking_id]["status"] = "confirmed"
-            booking_statuses[booking_id]["progress"] = 10
-            booking_statuses[booking_id]["eta"] = "Rescheduled - 45 minutes"
-            booking_statuses[booking_id]["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            status_engine.schedule(booking_id)
         
-        return jsonify({"success": True, "booking": booking}), 200
+        return jsonify({"success": True, "booking": public_booking(booking)}), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/cancel/<booking_id>", methods=["POST"])
@@ -485,70 +1015,287 @@ def cancel_booking(booking_id):
         if not booking:
             return jsonify({"success": False, "message": "Booking not found"}), 404
         
-        # Update booking status
-        booking["status"] = "Cancelled"
+        with booking_locks(booking_id):
+            # Update booking status
+            set_booking_status(booking, "Cancelled")
+            availability.release(booking_id)
+            
+            # Update status tracking
+            if booking_id in booking_statuses:
+                booking_statuses[booking_id]["status"] = "cancelled"
+                booking_statuses[booking_id]["progress"] = 0
+                booking_statuses[booking_id]["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                live_updates.publish(booking_id, booking_statuses[booking_id])
+            storage.save_booking(booking, booking_statuses.get(booking_id))
         
-        # Update status tracking
-        if booking_id in booking_statuses:
-            booking_statuses[booking_id]["status"] = "cancelled"
-            booking_statuses[booking_id]["progress"] = 0
-            booking_statuses[booking_id]["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        status_engine.cancel(booking_id)
         
-        return jsonify({"success": True, "booking": booking}), 200
+        return jsonify({"success": True, "booking": public_booking(booking)}), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/clear-bookings", methods=["POST"])
 def clear_bookings():
     try:
-        bookings.clear()
-        booking_statuses.clear()
+        clear_local_bookings()
+        storage.clear_bookings()
         return jsonify({"success": True, "message": "All bookings cleared"}), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
+
+
+# ===== BULK ROUTES =====
+
+BULK_PROVIDER_LISTS = ("services", "workingDays")
+BOOKING_EXPORT_FIELDS = Booking.FIELDS + ("trackingStatus", "progress", "eta", "lastUpdated")
+
+
+def bulk_provider_data(data):
+    """Check one uploaded provider row, as /api/register/provider would take it. Raises BulkError."""
+    for field in ("name", "category", "location"):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            raise BulkError(f"{field} is required")
+    for field in BULK_PROVIDER_LISTS:
+        if not isinstance(data.get(field, []), list):
+            raise BulkError(f"{field} must be a list")
+    if not isinstance(data.get("hourlyRate", ""), str):
+        raise BulkError("hourlyRate must be text such as \"₹500\"")
+    if "lat" in data or "lng" in data:  # CSV uploads give the coordinates as two columns
+        data["coordinates"] = {"lat": data.pop("lat", None), "lng": data.pop("lng", None)}
+    if data.get("coordinates") is not None:
+        try:
+            lat, lng = float(data["coordinates"]["lat"]), float(data["coordinates"]["lng"])
+        except (KeyError, TypeError, ValueError):
+            raise BulkError("coordinates need numeric lat and lng") from None
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise BulkError("lat/lng out of range")
+        data["coordinates"] = {"lat": lat, "lng": lng}
+    # Rows without an email are listed without a login, like the bundled providers
+    email = data.get("email")
+    if email is not None:
+        if not isinstance(email, str) or not email.strip():
+            raise BulkError("email must be text")
+        if not isinstance(data.get("password"), str) or not data["password"]:
+            raise BulkError("password is required with email")
+    return data
+
+
+def import_provider_batch(rows):
+    """Validate one batch of ``(line, record, error)`` rows and register the valid ones.
+
+    Passwords are hashed together on the hashing pool, and the catalog and
+    storage are each updated once for the batch. Returns ``(imported,
+    [(line, message), ...])``.
+    """
+    errors = []
+    accepted = []
+    emails = set()
+    for line, data, error in rows:
+        if error is None:
+            try:
+                data = bulk_provider_data(data)
+                if data.get("email") is not None and (data["email"] in registered_users or data["email"] in emails):
+                    raise BulkError("Email already registered")
+            except BulkError as e:
+                error = str(e)
+        if error is not None:
+            errors.append((line, error))
+            continue
+        if data.get("email") is not None:
+            emails.add(data["email"])
+        accepted.append((line, data))
+    if not accepted:
+        return 0, errors
+    
+    password_hashes = iter(password_hasher.hash_many([data["password"] for _, data in accepted
+                                                      if data.get("email") is not None]))
+    password_hashes = {data["email"]: next(password_hashes) for _, data in accepted if data.get("email") is not None}
+    
+    # Other workers only see this process's users after a sync, storage arbitrates
+    claim = uuid.uuid4().hex
+    claimed = storage.claim_emails([(email, claim) for email in password_hashes])
+    for line, data in accepted:
+        if data.get("email") is not None and data["email"] not in claimed:
+            errors.append((line, "Email already registered"))
+    accepted = [(line, data) for line, data in accepted if data.get("email") is None or data["email"] in claimed]
+    if not accepted:
+        errors.sort()
+        return 0, errors
+    try:
+        first_id = storage.next_value("provider_id", start=providers.max_id() + 1, count=len(accepted))
+    except BaseException:
+        for email in claimed:
+            storage.release_email(email, claim)
+        raise
+    
+    new_providers = []
+    new_users = []
+    for offset, (line, data) in enumerate(accepted):
+        provider_data = new_provider(first_id + offset, data)
+        if provider_data["email"] is not None:
+            user_data = new_provider_user(provider_data, password_hashes[provider_data["email"]])
+            # setdefault claims the email atomically when a signup races the import
+            if registered_users.setdefault(user_data["email"], user_data) is not user_data:
+                storage.release_email(user_data["email"], claim)
+                errors.append((line, "Email already registered"))
+                continue
+            stats_counters.record_user("provider")
+            new_users.append(user_data)
+        new_providers.append(provider_data)
+    
+    providers.add_many(new_providers)
+    registered_providers_list.extend(new_providers)
+    storage.save_providers(new_providers)
+    storage.save_users(new_users)
+    errors.sort()
+    return len(new_providers), errors
+
+
+@app.route("/api/providers/bulk", methods=["POST"])
+def bulk_import_providers():
+    """Register providers from an NDJSON or CSV upload (text/csv or ?format=csv).
+
+    Rows take the fields of /api/register/provider; in CSV, list cells are
+    separated by "|" and coordinates go in lat and lng columns. Bad rows are
+    skipped and reported by line number, the rest are imported.
+    """
+    if not admin_authorized():
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    try:
+        fmt = input_format()
+    except BulkError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    try:
+        imported = failed = 0
+        errors = []
+        for batch in batched(read_records(request.stream, fmt, BULK_PROVIDER_LISTS), BATCH_SIZE):
+            count, batch_errors = import_provider_batch(batch)
+            imported += count
+            failed += len(batch_errors)
+            errors.extend({"line": line, "message": message}
+                          for line, message in batch_errors[:MAX_ERRORS - len(errors)])
+        
+        return jsonify({"success": True, "imported": imported, "failed": failed, "errors": errors}), 200
+        
+    except Exception as e:
+        return server_error(e)
+
+
+def export_rows(booking_ids, status=None, created_from=None, created_to=None, flat=False):
+    # Reads bookings one at a time as the response is written
+    for booking_id in booking_ids:
+        booking = bookings.get(booking_id)
+        if booking is None or (status and booking["status"] != status):
+            continue
+        created = booking["createdAt"][:10]
+        if (created_from and created < created_from) or (created_to and created > created_to):
+            continue
+        status_info = booking_statuses.get(booking_id)
+        if not flat:
+            yield dict(booking, statusInfo=status_info)
+            continue
+        row = dict(booking)
+        if status_info is not None:
+            row.update(trackingStatus=status_info.get("status"), progress=status_info.get("progress"),
+                       eta=status_info.get("eta"), lastUpdated=status_info.get("lastUpdated"))
+        yield row
+
+
+@app.route("/api/bookings/export", methods=["GET"])
+def export_bookings():
+    """Stream bookings oldest first as NDJSON (with statusInfo) or flat CSV.
+
+    Optional filters: status, providerId, and from/to as YYYY-MM-DD creation dates.
+    """
+    if not admin_authorized():
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    try:
+        fmt = output_format()
+        provider_id = int(request.args["providerId"]) if request.args.get("providerId") else None
+        created_from = parse_date(request.args["from"]).isoformat() if request.args.get("from") else None
+        created_to = parse_date(request.args["to"]).isoformat() if request.args.get("to") else None
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    if provider_id is not None:
+        entry = provider_bookings_index.get(provider_id)
+        source = entry.booking_ids if entry else []
+    else:
+        source = booking_log
+    # New bookings are only appended, so the list can be walked while they come in;
+    # stopping at its current length keeps the export to one point in time
+    booking_ids = islice(source, len(source))
+    rows = export_rows(booking_ids, request.args.get("status"), created_from, created_to, flat=fmt == CSV)
+    body = write_csv(rows, BOOKING_EXPORT_FIELDS) if fmt == CSV else write_ndjson(rows, app.json.encode)
+    
+    return Response(stream_with_context(body), mimetype=MIMETYPES[fmt], headers={
+        "Content-Disposition": f'attachment; filename="bookings.{fmt}"',
+        "Cache-Control": "no-store"
+    })
 
 
 # ===== UTILITY ROUTES =====
 
 @app.route("/categories", methods=["GET"])
+@response_cache.cached(lambda: providers.version)
 def get_categories():
     try:
-        categories = list(set(provider["category"] for provider in providers))
+        categories = providers.categories()
         return jsonify(categories), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/locations", methods=["GET"])
+@response_cache.cached(lambda: providers.version)
 def get_locations():
     try:
-        locations = list(set(provider["location"] for provider in providers))
+        locations = providers.locations()
         return jsonify(locations), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
 
 
 @app.route("/api/stats", methods=["GET"])
 def get_stats():
     try:
-        stats = {
-            "totalProviders": len(providers),
-            "totalBookings": len(bookings),
-            "activeBookings": len([b for b in bookings.values() if b["status"] not in ["Completed", "Cancelled"]]),
-            "completedBookings": len([b for b in bookings.values() if b["status"] == "Completed"]),
-            "registeredCustomers": len([u for u in registered_users.values() if u["userType"] == "customer"]),
-            "registeredProviders": len([u for u in registered_users.values() if u["userType"] == "provider"])
-        }
+        stats = stats_counters.stats(len(providers))
+        response = {"success": True, "stats": stats}
+        
+        # ?check=1 recounts everything and reports any counter drift
+        if request.args.get("check") in ("1", "true"):
+            mismatches = stats_counters.check(bookings, registered_users, len(providers))
+            response["consistent"] = not mismatches
+            response["mismatches"] = mismatches
         
-        return jsonify({"success": True, "stats": stats}), 200
+        return jsonify(response), 200
         
     except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
+        return server_error(e)
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify({"success": True, "cache": response_cache.stats()}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(request_metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/metrics/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    profile = request_metrics.profile(profile_id)
+    if profile is None:
+        return jsonify({"success": False, "message": "Profile not found"}), 404
+    return Response(profile, mimetype="text/plain")
 
 
 # ===== ERROR HANDLERS =====
@@ -564,4 +1311,6 @@ def internal_error(error):
 
 
 if __name__ == "__main__":
+    status_engine.start()
+    start_sync()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,223 @@
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+from concurrency import StripedLock
+
+SLOT_MINUTES = 60
+DEFAULT_HOURS = (9 * 60, 18 * 60)
+NEXT_SLOT_DAYS = 14
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_TIME = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*$", re.IGNORECASE)
+
+
+class AvailabilityError(ValueError):
+    """The requested date or time cannot be booked with this provider."""
+
+
+class SlotTaken(AvailabilityError):
+    """Another booking already holds the requested slot."""
+
+
+def parse_time(value):
+    """Minutes after midnight for "9:00", "14:30" or "2:00 PM"; None if unreadable."""
+    match = _TIME.match(str(value or ""))
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem[0].lower() == "p" else 0)
+    if hours > 24 or minutes > 59 or hours * 60 + minutes > 24 * 60:
+        return None
+    return hours * 60 + minutes
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise AvailabilityError("date must be YYYY-MM-DD") from None
+
+
+def format_time(minutes):
+    # Same shape as the booking form's time options
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def working_window(provider):
+    """Return ``(start, end)`` minutes from ``workingHours``, falling back to 9:00-18:00."""
+    hours = provider.get("workingHours")
+    if isinstance(hours, dict):
+        start, end = parse_time(hours.get("start")), parse_time(hours.get("end"))
+    elif isinstance(hours, str) and "-" in hours:
+        start, end = (parse_time(part) for part in hours.split("-", 1))
+    else:
+        start = end = None
+    if start is None or end is None or end <= start:
+        return DEFAULT_HOURS
+    return start, end
+
+
+def working_weekdays(provider):
+    """Weekday numbers (Monday is 0) from ``workingDays``; no days listed means every day."""
+    days = provider.get("workingDays")
+    if isinstance(days, str):
+        days = days.split(",")
+    weekdays = {WEEKDAYS.index(day.strip()[:3].lower()) for day in days or ()
+                if day.strip()[:3].lower() in WEEKDAYS}
+    return weekdays or set(range(7))
+
+
+class AvailabilityCalendar:
+    """Booked slots per provider and day, one bit per slot.
+
+    Free slots for a day are the provider's working-hour bits minus the
+    booked bits, so listing them or finding the next free one is a few
+    integer operations per day. Reservations for one provider are
+    serialized by a striped lock. ``claim(provider_id, day, slot,
+    booking_id)`` and ``release(...)`` let a store shared between processes
+    arbitrate too; ``claim`` returns False when another process got there
+    first.
+    """
+
+    def __init__(self, slot_minutes=SLOT_MINUTES, claim=None, release=None):
+        self.slot_minutes = slot_minutes
+        self._claim = claim
+        self._release = release
+        self._booked = {}  # (provider id, day): bitmask of booked slots
+        self._holders = {}  # booking id: (provider id, day, slot)
+        self._provider_locks = StripedLock()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._holders)
+
+    def working_mask(self, provider):
+        start, end = working_window(provider)
+        first = -(-start // self.slot_minutes)
+        last = end // self.slot_minutes  # Slots must end by closing time
+        return ((1 << last) - 1) & ~((1 << first) - 1) if last > first else 0
+
+    def free_slots(self, provider, day):
+        """Return free start times ("9:00") for ``provider`` on ``day`` (a date or YYYY-MM-DD)."""
+        day = parse_date(day) if isinstance(day, str) else day
+        free = self._free_mask(provider, day, self.working_mask(provider), datetime.now())
+        return [format_time(slot * self.slot_minutes) for slot in range(free.bit_length()) if free >> slot & 1]
+
+    def next_free(self, provider, now=None, days=NEXT_SLOT_DAYS):
+        """Return ``(day, time)`` of the first free slot within ``days``, or None."""
+        now = now or datetime.now()
+        working = self.working_mask(provider)
+        weekdays = working_weekdays(provider)
+        for offset in range(days):
+            day = now.date() + timedelta(days=offset)
+            if day.weekday() not in weekdays:
+                continue
+            free = self._free_mask(provider, day, working, now)
+            if free:
+                slot = (free & -free).bit_length() - 1
+                return day.isoformat(), format_time(slot * self.slot_minutes)
+        return None
+
+    def reserve(self, provider, booking_id, day, time):
+        """Take the slot for a booking, or raise AvailabilityError / SlotTaken.
+
+        A booking that already holds a slot moves to the new one; its old
+        slot is only given up once the new one is secured.
+        """
+        day, slot = self._validate(provider, day, time)
+        provider_id = provider["id"]
+        key = (provider_id, day.isoformat())
+        with self._provider_locks(provider_id):
+            current = self._holders.get(booking_id)
+            if current == (provider_id, key[1], slot):
+                return
+            if self._booked.get(key, 0) >> slot & 1:
+                raise SlotTaken("That time slot is already booked")
+            if self._claim is not None and not self._claim(provider_id, key[1], slot, booking_id):
+                raise SlotTaken("That time slot is already booked")
+            with self._lock:
+                self._booked[key] = self._booked.get(key, 0) | 1 << slot
+                self._holders[booking_id] = (provider_id, key[1], slot)
+        if current is not None:
+            self._free(booking_id, current)
+
+    def release(self, booking_id):
+        current = self._holders.get(booking_id)
+        if current is not None:
+            self._free(booking_id, current)
+
+    def sync(self, booking):
+        """Mirror a booking recorded elsewhere (storage, another process) without validating it."""
+        booking_id = booking["id"]
+        wanted = None
+        minutes = parse_time(booking.get("time"))
+        if booking.get("status") != "Cancelled" and minutes is not None:
+            try:
+                wanted = (booking.get("providerId"), parse_date(booking.get("date")).isoformat(),
+                          minutes // self.slot_minutes)
+            except AvailabilityError:
+                wanted = None
+        current = self._holders.get(booking_id)
+        if current == wanted:
+            return
+        if current is not None:
+            self._free(booking_id, current, shared=False)
+        if wanted is not None:
+            key = wanted[:2]
+            with self._lock:
+                # The first booking seen keeps a slot that older data double-booked
+                if not self._booked.get(key, 0) >> wanted[2] & 1:
+                    self._booked[key] = self._booked.get(key, 0) | 1 << wanted[2]
+                    self._holders[booking_id] = wanted
+
+    def clear(self):
+        with self._lock:
+            self._booked.clear()
+            self._holders.clear()
+
+    def _validate(self, provider, day, time):
+        if not day or not time:
+            raise AvailabilityError("date and time are required")
+        day = parse_date(day)
+        if day < date.today():
+            raise AvailabilityError("date is in the past")
+        if day.weekday() not in working_weekdays(provider):
+            raise AvailabilityError(f"Provider does not work on {day.strftime('%A')}s")
+        minutes = parse_time(time)
+        if minutes is None:
+            raise AvailabilityError("time must look like 9:00 or 2:00 PM")
+        if minutes % self.slot_minutes:
+            raise AvailabilityError(f"time must start on a {self.slot_minutes} minute slot")
+        slot = minutes // self.slot_minutes
+        if not self.working_mask(provider) >> slot & 1:
+            start, end = working_window(provider)
+            raise AvailabilityError(f"Provider works {format_time(start)}-{format_time(end)}")
+        return day, slot
+
+    def _free_mask(self, provider, day, working, now):
+        if day.weekday() not in working_weekdays(provider) or day < now.date():
+            return 0
+        free = working & ~self._booked.get((provider["id"], day.isoformat()), 0)
+        if day == now.date():
+            # Only slots that have not started yet
+            started = -(-(now.hour * 60 + now.minute) // self.slot_minutes)
+            free &= ~((1 << started) - 1)
+        return free
+
+    def _free(self, booking_id, holder, shared=True):
+        provider_id, day, slot = holder
+        with self._lock:
+            if self._holders.get(booking_id) != holder:
+                return
+            del self._holders[booking_id]
+            remaining = self._booked.get((provider_id, day), 0) & ~(1 << slot)
+            if remaining:
+                self._booked[(provider_id, day)] = remaining
+            else:
+                self._booked.pop((provider_id, day), None)
+        if shared and self._release is not None:
+            self._release(provider_id, day, slot, booking_id)
@@ -0,0 +1,113 @@
+"""Bulk provider import and streaming booking export.
+
+Registers ``--providers`` providers once through /api/register/provider, one
+request each, and once as a single NDJSON upload to /api/providers/bulk,
+and reports both rates. Then for each of ``--exports`` booking counts fills
+the app with that many bookings and streams /api/bookings/export as NDJSON
+and CSV, reporting throughput and the peak memory tracemalloc sees while
+the response is written; it should stay flat as the count grows.
+
+    python benchmarks/bench_bulk.py --providers 2000 --exports 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_memory import booking_fields
+from common import make_provider, seed_providers
+
+TOKEN = "bench"
+
+
+def provider_row(i, rng):
+    provider = make_provider(i, rng)
+    return {"name": provider["name"], "category": provider["category"], "location": provider["location"],
+            "services": provider["services"], "hourlyRate": provider["priceRange"].split("/")[0].split(" ")[0],
+            "phone": provider["phone"], "email": f"bulk{i}@example.com", "password": "secret123"}
+
+
+def bench_import(service, client, count, seed):
+    rng = random.Random(seed)
+    rows = [provider_row(i, rng) for i in range(count)]
+
+    started = time.perf_counter()
+    for row in rows:
+        response = client.post("/api/register/provider", json=dict(row, email="one-" + row["email"]))
+        assert response.status_code == 201, response.json
+    single = time.perf_counter() - started
+
+    body = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+    started = time.perf_counter()
+    response = client.post("/api/providers/bulk", data=body, content_type="application/x-ndjson",
+                           headers={"Authorization": f"Bearer {TOKEN}"})
+    bulk = time.perf_counter() - started
+    assert response.json["imported"] == count, response.json
+
+    return {"providers": count,
+            "singleSeconds": round(single, 2), "singlePerSecond": round(count / single),
+            "bulkSeconds": round(bulk, 2), "bulkPerSecond": round(count / bulk),
+            "speedup": round(single / bulk, 1)}
+
+
+def fill_bookings(service, count, seed):
+    service.clear_local_bookings()
+    rng = random.Random(seed)
+    catalog = list(service.providers)
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    for n in range(count):
+        booking, status = booking_fields(n, catalog[n % len(catalog)], rng, start)
+        service.index_booking(service.Booking(booking), service.BookingStatus(status))
+    service.status_engine.clear()
+
+
+def bench_export(service, client, count, fmt):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    response = client.get(f"/api/bookings/export?format={fmt}", headers={"Authorization": f"Bearer {TOKEN}"},
+                          buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return {"format": fmt, "bookings": count, "seconds": round(elapsed, 2),
+            "perSecond": round(count / elapsed) if elapsed else None,
+            "mb": round(size / (1024 * 1024), 1), "peakKb": round(peak / 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", type=int, default=2000)
+    parser.add_argument("--catalog", type=int, default=5000)
+    parser.add_argument("--exports", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ["SERVICEHUB_STORAGE"] = "memory"
+    os.environ["SERVICEHUB_ADMIN_TOKEN"] = TOKEN
+    seed_providers(args.catalog, args.seed)
+    import app as service
+    client = service.app.test_client()
+
+    results = {"benchmark": "bulk", "import": bench_import(service, client, args.providers, args.seed),
+               "export": []}
+    for count in args.exports:
+        fill_bookings(service, count, args.seed)
+        for fmt in ("ndjson", "csv"):
+            results["export"].append(bench_export(service, client, count, fmt))
+    service.password_hasher.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
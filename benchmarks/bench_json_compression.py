@@ -0,0 +1,83 @@
+"""Encode time and bytes on the wire per endpoint.
+
+For each endpoint the response payload is re-encoded with Flask's default
+provider (stdlib, ASCII escapes) and with FastJSONProvider, then compressed
+with every encoding the server can offer.
+
+    python benchmarks/bench_json_compression.py --bookings 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+
+import app as service
+from compression import ENCODINGS, compress
+
+ENDPOINTS = ["/providers", "/providers?limit=100", "/my-bookings", "/my-bookings?limit=50", "/categories",
+             "/providers/search?q=repair&limit=100"]
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat * 1e6, 1)
+
+
+def book(client, count):
+    client.post("/api/register/customer", json={"email": "bench@example.com", "password": "secret", "name": "Bench"})
+    client.post("/api/login", json={"email": "bench@example.com", "password": "secret", "userType": "customer"})
+    provider = next(iter(service.providers))
+    for _ in range(count):
+        day, time_slot = service.availability.next_free(provider, days=3650)
+        client.post("/book", json={"providerId": provider["id"], "date": day, "time": time_slot,
+                                   "description": "கசிவு குழாய் பழுது 🔧"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = service.app.test_client()
+    book(client, args.bookings)
+    default = DefaultJSONProvider(service.app)
+    fast = service.app.json
+
+    results = {}
+    for endpoint in ENDPOINTS:
+        payload = json.loads(client.get(endpoint).get_data())
+        stdlib_body = default.dumps(payload, separators=(",", ":")).encode("utf-8")
+        fast_body = fast.encode(payload)
+        results[endpoint] = {
+            "encodeUs": {
+                "stdlib": per_call_us(lambda: default.dumps(payload, separators=(",", ":")), args.repeat),
+                fast.encoder: per_call_us(lambda: fast.encode(payload), args.repeat),
+            },
+            "bytes": {
+                "stdlibAscii": len(stdlib_body),
+                "utf8": len(fast_body),
+                **{encoding: len(compress(fast_body, encoding)) for encoding in ENCODINGS},
+            },
+            "compressUs": {encoding: per_call_us(lambda: compress(fast_body, encoding), args.repeat)
+                           for encoding in ENCODINGS},
+        }
+
+    print(json.dumps({
+        "benchmark": "json_compression",
+        "encoder": fast.encoder,
+        "providers": len(service.providers),
+        "bookings": len(service.bookings),
+        "endpoints": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
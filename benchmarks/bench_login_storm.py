@@ -0,0 +1,138 @@
+"""Login throughput and /providers latency during a login storm.
+
+Starts the app on a local threaded server, registers ``--users`` accounts and
+then fires ``--storm`` concurrent login loops while probe clients keep
+requesting /providers. Each pool size in ``--pool-workers`` is measured in
+turn; latencies are compared against the same probes on an idle server.
+
+    python benchmarks/bench_login_storm.py --storm 32 --pool-workers 1 2 4
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+import app as service
+from passwords import PasswordHasher
+from common import percentile
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.status
+
+
+def probe(port, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        request(port, "GET", "/providers?limit=20")
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def login_loop(port, users, offset, stop, statuses):
+    i = offset
+    while not stop.is_set():
+        email = users[i % len(users)]
+        status = request(port, "POST", "/api/login", {"email": email, "password": "secret", "userType": "customer"})
+        statuses[status] = statuses.get(status, 0) + 1
+        i += 1
+
+
+def measure_probes(port, seconds, probes):
+    stop = threading.Event()
+    latencies = []
+    threads = [threading.Thread(target=probe, args=(port, stop, latencies)) for _ in range(probes)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def storm(port, users, storm_size, seconds, probes):
+    stop = threading.Event()
+    statuses = [{} for _ in range(storm_size)]
+    latencies = []
+    threads = [threading.Thread(target=login_loop, args=(port, users, n, stop, statuses[n])) for n in range(storm_size)]
+    threads += [threading.Thread(target=probe, args=(port, stop, latencies)) for _ in range(probes)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    totals = {}
+    for thread_statuses in statuses:
+        for status, count in thread_statuses.items():
+            totals[status] = totals.get(status, 0) + count
+    return {
+        "loginsPerSec": round(totals.get(200, 0) / elapsed, 1),
+        "rejected503": totals.get(503, 0),
+        "statusCodes": {str(status): count for status, count in sorted(totals.items())},
+        "providersP50Ms": round(percentile(latencies, 50) * 1000, 2),
+        "providersP99Ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--storm", type=int, default=32, help="concurrent login loops")
+    parser.add_argument("--probes", type=int, default=2, help="concurrent /providers clients")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--pool-workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--queue", type=int, default=None, help="pending hashes allowed per pool")
+    parser.add_argument("--method", default="scrypt")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    service.password_hasher = PasswordHasher(method=args.method)
+    client = service.app.test_client()
+    users = [f"storm-{n}@example.com" for n in range(args.users)]
+    for email in users:
+        client.post("/api/register/customer", json={"email": email, "password": "secret", "name": "Storm"})
+
+    server = make_server("127.0.0.1", 0, service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    idle = measure_probes(port, args.seconds / 2, args.probes)
+    results = []
+    for workers in args.pool_workers:
+        service.password_hasher = PasswordHasher(method=args.method, workers=workers, max_pending=args.queue)
+        result = storm(port, users, args.storm, args.seconds, args.probes)
+        service.password_hasher.shutdown()
+        results.append({"poolWorkers": workers, **result})
+    server.shutdown()
+
+    print(json.dumps({
+        "benchmark": "login_storm",
+        "method": args.method,
+        "storm": args.storm,
+        "idleProvidersP50Ms": round(percentile(idle, 50) * 1000, 2),
+        "idleProvidersP99Ms": round(percentile(idle, 99) * 1000, 2),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Memory held by bookings and their statuses as dicts vs. compact records.
+
+Builds ``--bookings`` bookings the way /book does, once as plain dicts and
+once as Booking/BookingStatus records, and reports how much each grows the
+resident set of a fresh process. Also loads ``--providers`` providers
+through a JSON round trip, as storage does, with and without interning;
+those are measured with tracemalloc, since the strings interning frees
+stay in the process's heap and would not show in its RSS.
+
+    python benchmarks/bench_memory.py --bookings 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import make_provider
+from records import Booking, BookingStatus, compact_provider
+
+
+def make_providers(count, rng):
+    return [make_provider(i, rng) for i in range(1, count + 1)]
+
+
+def booking_fields(n, provider, rng, start):
+    # Strings are rebuilt per booking like the ones parsed out of a /book request
+    created = start + timedelta(seconds=n * 7)
+    day = created.date() + timedelta(days=rng.randint(1, 30))
+    price_range = provider["priceRange"]
+    return {
+        "id": f"BK{n:010X}",
+        "trackingId": f"SH{created:%y%m%d}{n:06d}",
+        "providerId": provider["id"],
+        "providerName": provider["name"],
+        "serviceType": "".join(["Re", "pair"]),
+        "date": day.isoformat(),
+        "time": f"{rng.randint(9, 17)}:00",
+        "description": None,
+        "phone": None,
+        "location": provider["location"],
+        "price": price_range.split(" - ")[0] if " - " in price_range else price_range.split("/")[0],
+        "status": "Confirmed",
+        "customerId": str(rng.randint(1, 50000)),
+        "createdAt": created.strftime("%Y-%m-%d %H:%M:%S"),
+    }, {
+        "status": "confirmed",
+        "progress": 10,
+        "providerLocation": {"lat": 11.0168 + rng.random(), "lng": 76.9558 + rng.random()},
+        "eta": "45 minutes",
+        "lastUpdated": created.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # Not Linux; the peak is close enough while only growing
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def build_bookings(count, providers, seed, compact):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    bookings, statuses = {}, {}
+    for n in range(count):
+        booking, status = booking_fields(n, providers[n % len(providers)], rng, start)
+        if compact:
+            booking, status = Booking(booking), BookingStatus(status)
+        bookings[booking["id"]] = booking
+        statuses[booking["id"]] = status
+    return bookings, statuses
+
+
+def measure(args, variant):
+    """Build one variant in this process and return how much it grew the RSS."""
+    providers = make_providers(args.providers, random.Random(args.seed))
+    if variant.startswith("providers"):
+        encoded = json.dumps(providers, ensure_ascii=False)
+        del providers
+    gc.collect()
+    before = rss_bytes()
+    started = time.perf_counter()
+    if variant == "bookings-dicts":
+        kept = build_bookings(args.bookings, providers, args.seed, False)
+    elif variant == "bookings-records":
+        kept = build_bookings(args.bookings, providers, args.seed, True)
+    else:
+        tracemalloc.start()
+        kept = json.loads(encoded)
+        if variant == "providers-interned":
+            kept = [compact_provider(p) for p in kept]
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        return {"bytes": size, "seconds": round(elapsed, 2), "kept": len(kept)}
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    return {"bytes": rss_bytes() - before, "seconds": round(elapsed, 2), "kept": len(kept)}
+
+
+def check_records(providers, seed):
+    # The records must serialize to exactly what the dicts did
+    plain, plain_statuses = build_bookings(1000, providers, seed, False)
+    bookings, statuses = build_bookings(1000, providers, seed, True)
+    for booking_id, booking in plain.items():
+        assert bookings[booking_id].to_dict() == booking
+        status = statuses[booking_id].to_dict()
+        assert dict(status, providerLocation=dict(status["providerLocation"])) == plain_statuses[booking_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--providers", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)  # One measurement, in a child process
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args, args.variant)))
+        return
+
+    check_records(make_providers(100, random.Random(args.seed)), args.seed)
+    results = {}
+    for variant in ("bookings-dicts", "bookings-records", "providers-dicts", "providers-interned"):
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--variant", variant,
+                                f"--bookings={args.bookings}", f"--providers={args.providers}",
+                                f"--seed={args.seed}"], capture_output=True, text=True, check=True)
+        results[variant] = json.loads(child.stdout)
+
+    def summary(variant, count, unit):
+        return {"bytes": results[variant]["bytes"], unit: round(results[variant]["bytes"] / count, 1),
+                "buildSeconds": results[variant]["seconds"]}
+
+    dicts, records = results["bookings-dicts"]["bytes"], results["bookings-records"]["bytes"]
+    plain, interned = results["providers-dicts"]["bytes"], results["providers-interned"]["bytes"]
+    print(json.dumps({
+        "benchmark": "memory",
+        "bookings": args.bookings,
+        "bookingStores": {"dicts": summary("bookings-dicts", args.bookings, "bytesPerBooking"),
+                          "records": summary("bookings-records", args.bookings, "bytesPerBooking")},
+        "bookingReduction": round(1 - records / dicts, 3),
+        "providers": args.providers,
+        "providersFromStorage": {"dicts": summary("providers-dicts", args.providers, "bytesPerProvider"),
+                                 "interned": summary("providers-interned", args.providers, "bytesPerProvider")},
+        "providerReduction": round(1 - interned / plain, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
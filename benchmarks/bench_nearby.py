@@ -0,0 +1,94 @@
+"""Nearest-provider lookup: geo grid index vs. a linear pass over every provider.
+
+The linear pass is what answering the question on top of the get_providers
+filter would take: compute every provider's distance, keep those in range and
+sort. ``--own-coordinates`` is the share of providers with exact coordinates;
+the rest sit at their city centre like the bundled data.
+
+    python benchmarks/bench_nearby.py --providers 100000 --queries 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import ProviderCatalog
+from common import CATEGORIES, make_provider
+from geo import CITY_COORDINATES, distance_km, parse_radius, provider_coordinates
+
+def linear_nearby(catalog, lat, lng, limit, category):
+    matches = []
+    for provider in catalog.filter(category=category):
+        point = provider_coordinates(provider)
+        if point is None:
+            continue
+        distance = distance_km(lat, lng, *point)
+        if distance <= parse_radius(provider.get("serviceRadius")):
+            matches.append((round(distance, 1), -provider["rating"], provider["id"], provider))
+    matches.sort(key=lambda match: match[:3])
+    return [match[3] for match in matches[:limit]]
+
+
+def timed(fn, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "p50Us": round(times[len(times) // 2] * 1e6, 1),
+        "p99Us": round(times[int(len(times) * 0.99)] * 1e6, 1),
+        "meanUs": round(sum(times) / len(times) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--linear-queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--own-coordinates", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    catalog = ProviderCatalog(
+        make_provider(i, rng, own_coordinates=args.own_coordinates) for i in range(1, args.providers + 1)
+    )
+    build_seconds = time.perf_counter() - start
+
+    cities = list(CITY_COORDINATES.values())
+    queries = []
+    for _ in range(args.queries):
+        lat, lng = rng.choice(cities)
+        category = rng.choice(list(CATEGORIES)) if rng.random() < 0.5 else None
+        queries.append((lat + rng.uniform(-0.1, 0.1), lng + rng.uniform(-0.1, 0.1), args.limit, category))
+
+    # Both must agree before their timings mean anything
+    for lat, lng, limit, category in queries[:args.linear_queries]:
+        indexed = [p["id"] for p, _ in catalog.nearby(lat, lng, limit=limit, category=category)]
+        linear = [p["id"] for p in linear_nearby(catalog, lat, lng, limit, category)]
+        if indexed != linear:
+            sys.exit(f"Mismatch at {lat},{lng} {category}: {indexed[:5]} vs {linear[:5]}")
+
+    print(json.dumps({
+        "benchmark": "nearby",
+        "providers": args.providers,
+        "ownCoordinates": args.own_coordinates,
+        "buildSeconds": round(build_seconds, 2),
+        "geoIndex": timed(lambda lat, lng, limit, category: catalog.nearby(lat, lng, limit=limit, category=category),
+                          queries),
+        "linearScan": timed(lambda lat, lng, limit, category: linear_nearby(catalog, lat, lng, limit, category),
+                            queries[:args.linear_queries]),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Repeated catalog requests with the response cache on and off.
+
+Replays a fixed mix of /providers, /providers/<id>, /categories and
+/locations requests through the app, first with the cache disabled, then
+enabled, then enabled with If-None-Match revalidation.
+
+    python benchmarks/bench_response_cache.py --requests 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as service
+
+
+def request_mix(rng, count):
+    categories = service.providers.categories()
+    locations = service.providers.locations()
+    provider_ids = [p["id"] for p in service.providers.page(limit=50)[0]]
+    urls = ["/categories", "/locations", "/providers?limit=20", "/providers?sort=rating&limit=20"]
+    urls += [f"/providers?category={category}&limit=20" for category in categories]
+    urls += [f"/providers?location={location}&sort=price&limit=20" for location in locations]
+    urls += [f"/providers/{provider_id}" for provider_id in provider_ids[:20]]
+    return [rng.choice(urls) for _ in range(count)]
+
+
+def run(client, urls, revalidate=False):
+    etags = {}
+    statuses = {}
+    start = time.perf_counter()
+    for url in urls:
+        headers = {"If-None-Match": etags[url]} if revalidate and url in etags else {}
+        response = client.get(url, headers=headers)
+        if "ETag" in response.headers:
+            etags[url] = response.headers["ETag"]
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - start
+    return {
+        "requestsPerSec": round(len(urls) / elapsed),
+        "meanUs": round(elapsed / len(urls) * 1e6, 1),
+        "statusCodes": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    urls = request_mix(random.Random(args.seed), args.requests)
+    client = service.app.test_client()
+
+    service.response_cache.enabled = False
+    off = run(client, urls)
+    service.response_cache.enabled = True
+    service.response_cache.clear()
+    on = run(client, urls)
+    revalidated = run(client, urls, revalidate=True)
+
+    print(json.dumps({
+        "benchmark": "response_cache",
+        "providers": len(service.providers),
+        "distinctUrls": len(set(urls)),
+        "cacheOff": off,
+        "cacheOn": on,
+        "cacheOnRevalidate": revalidated,
+        "cache": service.response_cache.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Provider search latency at catalog scale.
+
+Builds a catalog of synthetic providers and times /providers/search style
+queries: exact words, prefixes, misspellings and multi-word phrases.
+
+    python benchmarks/bench_search.py --providers 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import common
+from catalog import ProviderCatalog
+
+WORDS = ("experienced reliable certified affordable professional quick friendly licensed trusted local "
+         "residential commercial emergency weekend same day service quality guaranteed work years").split()
+QUERIES = ["AC repair", "plumb", "electrcian", "coimbatre", "deep cleaning chennai", "tiruchirapalli painter",
+           "waterproof", "furnture repair madurai", "Senthil", "inverter", "emergency leak", "wardrobe"]
+
+
+def make_provider(i, rng):
+    provider = common.make_provider(i, rng)
+    # Free-text descriptions give the BM25 index something beyond the field names
+    provider["description"] = " ".join(rng.choice(WORDS) for _ in range(12))
+    return provider
+
+
+def time_queries(catalog, repeat, limit):
+    queries = {}
+    for query in QUERIES:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = catalog.search(query, limit=limit)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        queries[query] = {
+            "p50Ms": round(times[len(times) // 2] * 1000, 2),
+            "maxMs": round(times[-1] * 1000, 2),
+            "top": results[0][0]["name"] + " / " + results[0][0]["location"] if results else None,
+        }
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    catalog = ProviderCatalog(make_provider(i, rng) for i in range(1, args.providers + 1))
+    build_seconds = time.perf_counter() - start
+
+    queries = time_queries(catalog, args.repeat, args.limit)
+
+    # Incremental updates leave unsorted additions behind; queries must stay fast
+    start = time.perf_counter()
+    for i in range(1, 1001):
+        catalog.update(i, {"description": "updated " + " ".join(rng.choice(WORDS) for _ in range(12))})
+    update_us = (time.perf_counter() - start) / 1000 * 1e6
+    after_updates = time_queries(catalog, args.repeat, args.limit)
+
+    print(json.dumps({
+        "benchmark": "search",
+        "providers": args.providers,
+        "buildSeconds": round(build_seconds, 2),
+        "updateUs": round(update_us, 1),
+        "queries": queries,
+        "afterUpdates": {query: result["p50Ms"] for query, result in after_updates.items()},
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
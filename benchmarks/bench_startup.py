@@ -0,0 +1,135 @@
+"""Worker startup time and memory with and without a catalog snapshot.
+
+Writes a ``tamilnadu_workers_6types`` module of ``--providers`` synthetic
+providers as a Python literal, like the bundled one, and builds a snapshot
+of it with snapshot.py. Then for each mode starts ``--workers`` processes at
+once that import the app and serve a first catalog page, a provider and a
+search, and reports per worker how long that took and its resident, private
+(USS) and proportional (PSS) memory while all of them are running. Pages of
+the mapped snapshot are shared, so they count in RSS but are split in PSS.
+
+    python benchmarks/bench_startup.py --providers 100000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_provider
+
+FIRST_REQUESTS = ["/providers?limit=20", "/providers?category=Plumber&sort=rating&limit=20", "/providers/1"]
+
+
+def memory_mb():
+    """RSS, USS and PSS of this process from /proc/self/smaps_rollup; RSS alone elsewhere."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1] == "kB"}
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rssMb": round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)}
+    return {"rssMb": round(fields["Rss"] / 1024, 1),
+            "ussMb": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1),
+            "pssMb": round(fields["Pss"] / 1024, 1)}
+
+
+def worker():
+    # One worker: start, answer the first requests, then hold until told to measure
+    began = time.perf_counter()
+    import app as service
+    imported = time.perf_counter()
+    client = service.app.test_client()
+    for path in FIRST_REQUESTS:
+        assert client.get(path).status_code == 200, path
+    served = time.perf_counter()
+    assert client.get("/providers/search?q=plumber&limit=10").status_code == 200
+    searched = time.perf_counter()
+    print(json.dumps({"ready": True}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps({
+        "importSeconds": round(imported - began, 3),
+        "firstRequestsMs": round((served - imported) * 1000, 1),
+        "firstSearchMs": round((searched - served) * 1000, 1),
+        "providers": len(service.providers),
+        **memory_mb(),
+    }), flush=True)
+
+
+def run_workers(count, env):
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker"], env=env, cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(count)]
+    for proc in procs:  # All alive before any measures, so shared pages are split between them
+        json.loads(proc.stdout.readline())
+    results = []
+    for proc in procs:
+        proc.stdin.write("\n")
+        proc.stdin.flush()
+    for proc in procs:
+        results.append(json.loads(proc.stdout.readline()))
+        proc.wait()
+    return results
+
+
+def summary(results):
+    keys = [key for key in results[0] if key != "providers"]
+    return {"workers": results,
+            "mean": {key: round(sum(r[key] for r in results) / len(results), 3) for key in keys},
+            "totalPssMb": round(sum(r.get("pssMb", r["rssMb"]) for r in results), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--providers", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(args.seed)
+        with open(os.path.join(tmp, "tamilnadu_workers_6types.py"), "w", encoding="utf-8") as f:
+            f.write("providers = [\n")
+            for i in range(1, args.providers + 1):
+                f.write(f"    {make_provider(i, rng)!r},\n")
+            f.write("]\n")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([tmp, ROOT]), SERVICEHUB_STORAGE="memory")
+        env.pop("SERVICEHUB_SNAPSHOT", None)
+        # Compile the module once, as a deployed one would already be
+        subprocess.run([sys.executable, "-c", "import tamilnadu_workers_6types"], env=env, check=True)
+
+        snapshot_path = os.path.join(tmp, "providers.snapshot")
+        began = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "snapshot.py"), "--output", snapshot_path],
+                       env=env, check=True, capture_output=True)
+        build_seconds = time.perf_counter() - began
+        snapshot_mb = os.path.getsize(snapshot_path) / (1024 * 1024)
+
+        dataset = summary(run_workers(args.workers, env))
+        snapshot = summary(run_workers(args.workers, dict(env, SERVICEHUB_SNAPSHOT=snapshot_path)))
+
+    print(json.dumps({
+        "benchmark": "startup",
+        "providers": args.providers,
+        "workersPerMode": args.workers,
+        "snapshotBuildSeconds": round(build_seconds, 2),
+        "snapshotMb": round(snapshot_mb, 1),
+        "dataset": dataset,
+        "snapshot": snapshot,
+        "importSpeedup": round(dataset["mean"]["importSeconds"] / snapshot["mean"]["importSeconds"], 1),
+        "pssReduction": round(1 - snapshot["totalPssMb"] / dataset["totalPssMb"], 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Status update cost: legacy full sweep vs. StatusEngine, at fixed active volume.
+
+Run from the repository root:
+
+    python benchmarks/bench_status_engine.py --total 10000 100000 --active 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from status_engine import FINAL_STATUSES, StatusEngine, advance_status
+
+
+def make_statuses(total, active):
+    statuses = {}
+    for i in range(total):
+        done = i >= active
+        statuses[f"BK{i:08d}"] = {
+            "status": "completed" if done else "confirmed",
+            "progress": 100 if done else 10,
+            "providerLocation": {"lat": 13.0827, "lng": 80.2707},
+            "eta": "45 minutes",
+            "lastUpdated": "",
+        }
+    return statuses
+
+
+def legacy_sweep(statuses):
+    # Shape of the old /update-booking-status loop: visits every booking
+    for status_info in statuses.values():
+        if status_info["status"] not in FINAL_STATUSES and status_info["progress"] < 100:
+            advance_status(status_info)
+
+
+def reset_active(statuses, active):
+    for i in range(active):
+        status_info = statuses[f"BK{i:08d}"]
+        status_info["status"] = "confirmed"
+        status_info["progress"] = 10
+
+
+def bench(total, active, rounds):
+    statuses = make_statuses(total, active)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        reset_active(statuses, active)
+        legacy_sweep(statuses)
+    legacy = (time.perf_counter() - start) / rounds
+
+    clock = [0.0]
+    engine = StatusEngine(statuses, step_seconds=1.0, batch_size=total + 1, clock=lambda: clock[0])
+    elapsed = 0.0
+    for _ in range(rounds):
+        reset_active(statuses, active)
+        for i in range(active):
+            engine.schedule(f"BK{i:08d}", delay=0)
+        start = time.perf_counter()
+        engine.tick()
+        elapsed += time.perf_counter() - start
+        engine.clear()
+    tick = elapsed / rounds
+
+    return {
+        "totalBookings": total,
+        "activeBookings": active,
+        "legacySweepMs": round(legacy * 1000, 3),
+        "engineTickMs": round(tick * 1000, 3),
+        "engineBookingsPerSec": round(active / tick) if tick else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--total", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--active", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    results = [bench(total, min(args.active, total), args.rounds) for total in args.total]
+    print(json.dumps({"benchmark": "status_engine", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
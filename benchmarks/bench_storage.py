@@ -0,0 +1,94 @@
+"""Booking insert and lookup throughput for each storage backend.
+
+    python benchmarks/bench_storage.py --bookings 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import MemoryStorage, SQLiteStorage
+
+
+def make_booking(i):
+    booking = {
+        "id": f"BK{i:06X}",
+        "trackingId": f"SH260101{i:03d}",
+        "providerId": i % 5000 + 1,
+        "providerName": f"Worker {i % 5000 + 1}",
+        "serviceType": "Plumbing",
+        "date": "2026-01-01",
+        "time": "10:00",
+        "description": "Leaking tap",
+        "phone": "9876543210",
+        "location": "Chennai",
+        "price": "₹500",
+        "status": "Confirmed",
+        "createdAt": "2026-01-01 09:00:00",
+    }
+    status_info = {
+        "status": "confirmed",
+        "progress": 10,
+        "providerLocation": {"lat": 13.0827, "lng": 80.2707},
+        "eta": "45 minutes",
+        "lastUpdated": "2026-01-01 09:00:00",
+    }
+    return booking, status_info
+
+
+def rate(count, seconds):
+    return round(count / seconds) if seconds else None
+
+
+def bench(name, storage, count, lookups):
+    records = [make_booking(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for booking, status_info in records:
+        storage.save_booking(booking, status_info)
+    storage.flush()
+    insert = time.perf_counter() - start
+
+    sample = random.Random(0).choices(records, k=lookups)
+    start = time.perf_counter()
+    for booking, _ in sample:
+        storage.get_booking(booking["id"])
+    by_id = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for booking, _ in sample:
+        storage.get_booking_by_tracking_id(booking["trackingId"])
+    by_tracking = time.perf_counter() - start
+
+    return {
+        "backend": name,
+        "bookings": count,
+        "insertsPerSec": rate(count, insert),
+        "lookupsByIdPerSec": rate(lookups, by_id),
+        "lookupsByTrackingIdPerSec": rate(lookups, by_tracking),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    results = [bench("memory", MemoryStorage(), args.bookings, args.lookups)]
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteStorage(os.path.join(tmp, "bench.db"))
+        try:
+            results.append(bench("sqlite", sqlite, args.bookings, args.lookups))
+        finally:
+            sqlite.close()
+    print(json.dumps({"benchmark": "storage", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Requests/sec on /providers and /book for 1 vs. N worker processes.
+
+Starts server.py on a fresh SQLite database for each worker count and drives
+it from ``--clients`` threads for ``--seconds`` per endpoint.
+
+    python benchmarks/bench_workers.py --workers 1 4 --clients 32
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from availability import SLOT_MINUTES, format_time, working_weekdays, working_window
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/categories")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def booking_bodies(port):
+    """Return a thread-safe callable producing /book bodies for distinct open slots."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", "/providers?limit=100")
+    listed = json.loads(conn.getresponse().read())["providers"]
+    conn.close()
+
+    def slots():
+        day = date.today()
+        while True:
+            day += timedelta(days=1)
+            for provider in listed:
+                if day.weekday() not in working_weekdays(provider):
+                    continue
+                start, end = working_window(provider)
+                for minutes in range(-(-start // SLOT_MINUTES) * SLOT_MINUTES, end - SLOT_MINUTES + 1, SLOT_MINUTES):
+                    yield json.dumps({"providerId": provider["id"], "serviceType": "Repair",
+                                      "date": day.isoformat(), "time": format_time(minutes)})
+
+    generator = slots()
+    lock = threading.Lock()
+
+    def next_body():
+        with lock:
+            return next(generator)
+    return next_body
+
+
+def drive(port, method, path, body, clients, seconds):
+    done, errors = [0], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client():
+        count = failed = 0
+        headers = {"Content-Type": "application/json"}
+        while time.monotonic() < deadline:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            try:
+                conn.request(method, path, body=body() if callable(body) else body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                count += 1
+                failed += response.status >= 400
+            except OSError:
+                failed += 1
+            finally:
+                conn.close()
+        with lock:
+            done[0] += count
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return {"requestsPerSec": round(done[0] / elapsed, 1), "errors": errors[0]}
+
+
+def bench(workers, args):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SERVICEHUB_STORAGE=f"sqlite:///{os.path.join(tmp, 'bench.db')}?shared=1")
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py"), "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers)],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(port)
+            book = booking_bodies(port)
+            return {
+                "workers": workers,
+                "providers": drive(port, "GET", "/providers?limit=20", None, args.clients, args.seconds),
+                "book": drive(port, "POST", "/book", book, args.clients, args.seconds),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    results = [bench(workers, args) for workers in dict.fromkeys(args.workers)]
+    print(json.dumps({"benchmark": "workers", "cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Synthetic providers and small helpers shared by the benchmarks."""
+import os
+import random
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import CITY_COORDINATES
+
+CATEGORIES = {
+    "Plumber": ("🔧", ["Pipe repair", "Tap installation", "Leak fixing", "Bathroom fitting"]),
+    "Electrician": ("⚡", ["Wiring", "Switchboard repair", "Fan installation", "Inverter setup"]),
+    "Carpenter": ("🪚", ["Furniture repair", "Door fitting", "Modular kitchen", "Wardrobe making"]),
+    "Painter": ("🎨", ["Interior painting", "Exterior painting", "Waterproofing", "Texture design"]),
+    "Cleaner": ("🧹", ["Deep cleaning", "Sofa cleaning", "Kitchen cleaning", "Pest control"]),
+    "AC Technician": ("❄️", ["AC repair", "AC installation", "Gas refilling", "AC servicing"]),
+}
+LOCATIONS = ["Chennai", "Coimbatore", "Madurai", "Tiruchirappalli", "Salem", "Tirunelveli", "Erode", "Vellore",
+             "Thoothukudi", "Thanjavur", "Dindigul", "Kanchipuram"]
+FIRST = ["Arun", "Bala", "Karthik", "Murugan", "Senthil", "Priya", "Lakshmi", "Vijay", "Ganesh", "Anitha"]
+LAST = ["Kumar", "Raj", "Selvam", "Pandian", "Devi", "Krishnan", "Subramani", "Natarajan"]
+WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_provider(i, rng, own_coordinates=0.0):
+    """A provider shaped like those in ``tamilnadu_workers_6types``.
+
+    ``own_coordinates`` is the chance it gets exact coordinates near its
+    city; otherwise it sits at the city centre like the bundled data.
+    """
+    category = rng.choice(list(CATEGORIES))
+    avatar, services = CATEGORIES[category]
+    low = rng.randint(2, 8) * 100
+    provider = {
+        "id": i,
+        "name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+        "category": category,
+        "avatar": avatar,
+        "rating": round(rng.uniform(3.5, 5.0), 1),
+        "reviews": rng.randint(0, 400),
+        "services": rng.sample(services, 3),
+        "priceRange": f"₹{low} - ₹{low * 2}" if i % 2 else f"₹{low}/hour",
+        "verified": rng.random() < 0.8,
+        "location": rng.choice(LOCATIONS),
+        "experience": f"{rng.randint(1, 20)} years",
+        "description": f"Experienced {category.lower()} serving {rng.choice(LOCATIONS)} and nearby areas",
+        "phone": f"9{rng.randint(100000000, 999999999)}",
+        "workingDays": WEEK[:rng.choice((5, 6, 7))],
+        "workingHours": {"start": "09:00", "end": rng.choice(("17:00", "18:00", "20:00"))},
+        "serviceRadius": f"{rng.choice((5, 10, 15))} km",
+    }
+    if own_coordinates and rng.random() < own_coordinates:
+        lat, lng = CITY_COORDINATES[provider["location"]]
+        provider["coordinates"] = {"lat": lat + rng.uniform(-0.15, 0.15), "lng": lng + rng.uniform(-0.15, 0.15)}
+    return provider
+
+
+def seed_providers(size, seed):
+    # Stands in for the dataset module so each run controls the catalog size
+    module = types.ModuleType("tamilnadu_workers_6types")
+    rng = random.Random(seed)
+    module.providers = [make_provider(i, rng) for i in range(1, size + 1)]
+    sys.modules["tamilnadu_workers_6types"] = module
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
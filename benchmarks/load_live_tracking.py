@@ -0,0 +1,134 @@
+"""Local load test: polling /track/<id> vs. streaming /track/<id>/stream.
+
+Starts the app on a local threaded server, books a few services and attaches
+``--watchers`` clients to each booking. Polling clients request the booking
+every ``--poll-interval`` seconds; streaming clients hold one SSE connection.
+The status engine is stepped every ``--step`` seconds in both modes.
+
+    python benchmarks/load_live_tracking.py --bookings 20 --watchers 25
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+import app as service
+from common import percentile
+
+
+def book(count):
+    client = service.app.test_client()
+    provider = next(iter(service.providers))
+    booking_ids = []
+    for _ in range(count):
+        # Each booking needs its own free slot
+        day, time_slot = service.availability.next_free(provider, days=365)
+        response = client.post("/book", json={"providerId": provider["id"], "date": day, "time": time_slot})
+        booking_ids.append(response.json["bookingId"])
+    return booking_ids
+
+
+def drive_engine(step, step_times):
+    # Step until every booking has completed
+    while len(service.status_engine):
+        time.sleep(step)
+        step_times.append(time.perf_counter())
+        service.status_engine.advance_all()
+
+
+def poll_watcher(port, booking_id, interval, stop, latencies):
+    while not stop.is_set():
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        start = time.perf_counter()
+        conn.request("GET", f"/track/{booking_id}")
+        conn.getresponse().read()
+        latencies.append(time.perf_counter() - start)
+        conn.close()
+        time.sleep(interval)
+
+
+def stream_watcher(port, booking_id, step_times, latencies):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", f"/track/{booking_id}/stream")
+    response = conn.getresponse()
+    event_id = None
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\n")
+        if line.startswith("id: "):
+            event_id = int(line[4:])
+        elif line.startswith("event: delta") and event_id:
+            # Event n of a booking is produced by engine step n
+            latencies.append(time.perf_counter() - step_times[event_id - 1])
+    conn.close()
+
+
+def run(mode, args, port):
+    service.app.test_client().post("/clear-bookings")
+    booking_ids = book(args.bookings)
+    step_times, latencies, stop = [], [], threading.Event()
+    requests_before = service_requests[0]
+
+    if mode == "poll":
+        watchers = [threading.Thread(target=poll_watcher, args=(port, b, args.poll_interval, stop, latencies))
+                    for b in booking_ids for _ in range(args.watchers)]
+    else:
+        watchers = [threading.Thread(target=stream_watcher, args=(port, b, step_times, latencies))
+                    for b in booking_ids for _ in range(args.watchers)]
+    for watcher in watchers:
+        watcher.start()
+    if mode == "stream":
+        while service.live_updates.watcher_count() < len(watchers):
+            time.sleep(0.01)
+    drive_engine(args.step, step_times)
+    stop.set()
+    for watcher in watchers:
+        watcher.join()
+
+    return {
+        "mode": mode,
+        "bookings": args.bookings,
+        "watchersPerBooking": args.watchers,
+        "httpRequests": service_requests[0] - requests_before,
+        "samples": len(latencies),
+        "p50Ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p99Ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+    }
+
+
+service_requests = [0]
+
+
+@service.app.before_request
+def count_request():
+    service_requests[0] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=20)
+    parser.add_argument("--watchers", type=int, default=25)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--step", type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        results = [run(mode, args, server.server_port) for mode in ("poll", "stream")]
+    finally:
+        server.shutdown()
+    # p50/p99 are request latency for polling and change-to-delivery latency for streaming
+    print(json.dumps({"benchmark": "live_tracking", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
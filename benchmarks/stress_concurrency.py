@@ -0,0 +1,161 @@
+"""Concurrency stress test for registration, booking and status updates.
+
+Hammers the app from many threads at once, with the status engine ticking in
+the background, then stops the engine and checks that no request failed and
+that ids, indexes and counters are still consistent. Registrations the
+hashing pool turns away with 503 and Retry-After are retried, not counted as
+failures. Exits non-zero on any violation.
+
+    python benchmarks/stress_concurrency.py --threads 1 8 32 --ops 400
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as service
+
+BUSY_RETRIES = 200
+
+
+def post_with_retry(client, path, payload, rng):
+    # Register answers 503 with Retry-After when the hashing pool is full; that is
+    # backpressure working, so back off and retry rather than count a failure
+    for _ in range(BUSY_RETRIES):
+        response = client.post(path, json=payload)
+        if response.status_code != 503 or "Retry-After" not in response.headers:
+            return response
+        time.sleep(rng.uniform(0.005, 0.05))
+    return response
+
+
+def worker(thread_no, ops, provider_ids, results, barrier):
+    client = service.app.test_client()
+    rng = random.Random(thread_no)
+    days = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(1, 8)]
+    booked, errors, statuses = [], [], {}
+    barrier.wait()
+    for op_no in range(ops):
+        # Every thread starts by racing for the same few emails
+        op = 0.0 if op_no < 5 else 0.12 if op_no < 10 else rng.random()
+        if op < 0.1:
+            response = post_with_retry(client, "/api/register/provider", {
+                "email": f"stress-provider-{op_no % 5}@example.com", "password": "pw", "name": "Stress",
+                "category": "Plumber", "location": "Chennai",
+            }, rng)
+        elif op < 0.15:
+            response = post_with_retry(client, "/api/register/customer", {
+                "email": f"stress-customer-{op_no % 5}@example.com", "password": "pw", "name": "Stress",
+            }, rng)
+        elif op < 0.55:
+            # Few enough slots that threads regularly race for the same one
+            response = client.post("/book", json={
+                "providerId": rng.choice(provider_ids), "date": rng.choice(days), "time": f"{rng.randint(9, 17)}:00",
+            })
+            if response.status_code == 201:
+                booked.append(response.json["bookingId"])
+        elif op < 0.65 and booked:
+            response = client.post(f"/cancel/{rng.choice(booked)}")
+        elif op < 0.7 and booked:
+            response = client.post(f"/reschedule/{rng.choice(booked)}", json={
+                "date": rng.choice(days), "time": f"{rng.randint(9, 17)}:00",
+            })
+        elif op < 0.75:
+            response = client.post("/update-booking-status")
+        elif op < 0.9 and booked:
+            response = client.get(f"/track/{rng.choice(booked)}")
+            if response.status_code == 200 and not response.json["statusInfo"]:
+                errors.append("booking visible without its status")
+        else:
+            response = client.get("/api/stats")
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code >= 500:
+            errors.append(f"{response.status_code} {response.get_data(as_text=True)[:200]}")
+    results[thread_no] = (booked, errors, statuses)
+
+
+def check_invariants(errors):
+    ids = [p["id"] for p in service.providers]
+    if len(ids) != len(set(ids)):
+        errors.append("duplicate provider ids")
+    for i in range(5):
+        for kind in ("provider", "customer"):
+            email = f"stress-{kind}-{i}@example.com"
+            if email not in service.registered_users:
+                errors.append(f"{email} missing")
+    stress_providers = [p for p in service.providers if str(p.get("email", "")).startswith("stress-provider-")]
+    if len(stress_providers) != 5:
+        errors.append(f"{len(stress_providers)} providers registered for 5 racing emails")
+    for booking_id, booking in list(service.bookings.items()):
+        if booking_id not in service.booking_statuses:
+            errors.append(f"{booking_id} has no status")
+        if service.tracking_index.get(booking["trackingId"]) != booking_id:
+            errors.append(f"{booking_id} tracking id does not resolve")
+    slots = {}
+    for booking in list(service.bookings.values()):
+        if booking["status"] != "Cancelled":
+            slot = (booking["providerId"], booking["date"], booking["time"])
+            if slot in slots:
+                errors.append(f"{booking['id']} and {slots[slot]} share a slot")
+            slots[slot] = booking["id"]
+    mismatches = service.stats_counters.check(service.bookings, service.registered_users, len(service.providers))
+    if mismatches:
+        errors.append(f"counter drift: {mismatches}")
+
+
+def run(threads, ops):
+    client = service.app.test_client()
+    client.post("/clear-bookings")
+    provider_ids = [p["id"] for p in service.providers.page(limit=50)[0]]
+    results = {}
+    barrier = threading.Barrier(threads)
+    workers = [threading.Thread(target=worker, args=(n, ops, provider_ids, results, barrier)) for n in range(threads)]
+    service.status_engine.start()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    # The invariants are checked at rest; a ticking engine would move the counters mid-check
+    service.status_engine.stop()
+
+    errors, statuses = [], {}
+    for booked, thread_errors, thread_statuses in results.values():
+        errors.extend(thread_errors)
+        for code, count in thread_statuses.items():
+            statuses[code] = statuses.get(code, 0) + count
+    check_invariants(errors)
+    return {
+        "threads": threads,
+        "requests": threads * ops,
+        "requestsPerSec": round(threads * ops / elapsed),
+        "statusCodes": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": errors[:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ops", type=int, default=400, help="requests per thread")
+    args = parser.parse_args()
+
+    service.status_engine.step_seconds = 0.01
+    service.status_engine.tick_seconds = 0.005
+    try:
+        results = [run(threads, args.ops) for threads in args.threads]
+    finally:
+        service.status_engine.stop()
+    print(json.dumps({"benchmark": "stress_concurrency", "results": results}, indent=2))
+    sys.exit(1 if any(result["errors"] for result in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
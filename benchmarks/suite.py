@@ -0,0 +1,309 @@
+"""Throughput, latency percentiles and peak memory for the main API routes.
+
+Each catalog size runs in a fresh process seeded with synthetic providers
+shaped like ``tamilnadu_workers_6types``, plus ``--customers`` registered
+customers and ``--bookings`` bookings. Every route is driven in turn through
+the Flask test client, then a subset is driven over HTTP against a threaded
+local server from ``--clients`` threads. Results are printed as JSON; pass
+an earlier run as ``--baseline`` to get the change per route.
+
+    python benchmarks/suite.py --sizes 1000 10000 100000 > after.json
+    python benchmarks/suite.py --baseline before.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from availability import SLOT_MINUTES, format_time, working_weekdays, working_window
+from common import CATEGORIES, LOCATIONS, percentile, seed_providers
+
+def rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "requestsPerSec": round(len(latencies) / elapsed, 1),
+        "p50Ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95Ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99Ms": round(percentile(latencies, 99) * 1000, 3),
+        "maxMs": round(latencies[-1] * 1000, 3),
+        "statusCodes": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def open_slots(providers):
+    """Thread-safe callable returning distinct bookable (provider, date, time) triples."""
+    def walk():
+        day = date.today()
+        while True:
+            day += timedelta(days=1)
+            for provider in providers:
+                if day.weekday() not in working_weekdays(provider):
+                    continue
+                start, end = working_window(provider)
+                first = -(-start // SLOT_MINUTES) * SLOT_MINUTES
+                for minutes in range(first, end - SLOT_MINUTES + 1, SLOT_MINUTES):
+                    yield provider["id"], day.isoformat(), format_time(minutes)
+
+    slots = walk()
+    lock = threading.Lock()
+
+    def next_slot():
+        with lock:
+            return next(slots)
+    return next_slot
+
+
+def drive_client(requests, count):
+    """Issue ``count`` requests from the ``requests`` callables in rotation, one at a time."""
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    for n in range(count):
+        began = time.perf_counter()
+        status = requests[n % len(requests)]()
+        latencies.append(time.perf_counter() - began)
+        statuses[status] = statuses.get(status, 0) + 1
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+def http_request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def drive_server(port, make_request, clients, seconds):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(n):
+        own_latencies, own_statuses = [], {}
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(n)
+            began = time.perf_counter()
+            try:
+                status = http_request(port, method, path, body)
+            except OSError:
+                status = "error"
+            own_latencies.append(time.perf_counter() - began)
+            own_statuses[status] = own_statuses.get(status, 0) + 1
+            n += clients
+        with lock:
+            latencies.extend(own_latencies)
+            for status, count in own_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+def run_size(args):
+    seed_providers(args.run, args.seed)
+    started = time.perf_counter()
+    import app as service
+    from werkzeug.serving import make_server
+
+    startup = {"importSeconds": round(time.perf_counter() - started, 2), "rssMb": rss_mb()}
+    service.response_cache.enabled = args.cache
+    rng = random.Random(args.seed)
+    catalog = list(service.providers)
+    next_slot = open_slots(rng.sample(catalog, min(len(catalog), 200)))
+
+    anonymous = service.app.test_client()
+    customers = []
+    for n in range(args.customers):
+        email = f"customer-{n}@example.com"
+        anonymous.post("/api/register/customer", json={"email": email, "password": "secret", "name": f"Customer {n}"})
+        client = service.app.test_client()
+        client.post("/api/login", json={"email": email, "password": "secret", "userType": "customer"})
+        customers.append((email, client))
+
+    def book(client):
+        provider_id, day, time_slot = next_slot()
+        return client.post("/book", json={"providerId": provider_id, "date": day, "time": time_slot,
+                                          "serviceType": "Repair", "description": "Kitchen tap leaking"}).status_code
+
+    routes = {}
+    routes["book"] = drive_client([lambda client=client: book(client) for _, client in customers], args.bookings)
+    booked = list(service.bookings.values())
+    booking_ids = [booking["id"] for booking in rng.sample(booked, min(len(booked), 500))]
+    tracking_ids = [service.bookings[booking_id]["trackingId"] for booking_id in booking_ids]
+    provider_ids = list({booking["providerId"] for booking in booked})
+    seeded = {"rssMb": rss_mb(), "bookings": len(service.bookings), "customers": len(customers)}
+
+    provider_urls = ["/providers?limit=20", "/providers?sort=rating&limit=20", "/providers?sort=price&limit=50",
+                     "/providers?rating=4.5&limit=20", "/providers?fields=id,name,rating&limit=100"]
+    provider_urls += [f"/providers?category={quote(category)}&limit=20" for category in CATEGORIES]
+    provider_urls += [f"/providers?location={location}&sort=rating&limit=20" for location in LOCATIONS[:6]]
+    provider_urls += [f"/providers?category={quote(category)}&location={location}&limit=20"
+                      for category, location in zip(CATEGORIES, LOCATIONS)]
+    routes["providers"] = drive_client([lambda url=url: anonymous.get(url).status_code for url in provider_urls],
+                                       args.requests)
+    routes["providerById"] = drive_client(
+        [lambda i=i: anonymous.get(f"/providers/{i}").status_code for i in rng.sample(range(1, args.run + 1), 200)],
+        args.requests)
+    routes["track"] = drive_client(
+        [lambda i=i: anonymous.get(f"/track/{i}").status_code for i in booking_ids], args.requests)
+    routes["trackByTrackingId"] = drive_client(
+        [lambda i=i: anonymous.get(f"/track/by-tracking-id/{i}").status_code for i in tracking_ids], args.requests)
+    routes["providerDashboard"] = drive_client(
+        [lambda i=i: anonymous.get(f"/api/provider/dashboard/{i}").status_code for i in provider_ids], args.requests)
+    routes["myBookings"] = drive_client(
+        [lambda client=client: client.get("/my-bookings?limit=20").status_code for _, client in customers],
+        args.requests)
+    routes["updateBookingStatus"] = drive_client([lambda: anonymous.post("/update-booking-status").status_code],
+                                                 max(1, args.requests // 10))
+    routes["login"] = drive_client(
+        [lambda email=email: anonymous.post("/api/login", json={"email": email, "password": "secret",
+                                                                 "userType": "customer"}).status_code
+         for email, _ in customers], args.logins)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, service.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    emails = [email for email, _ in customers]
+
+    def book_body(n):
+        provider_id, day, time_slot = next_slot()
+        return "POST", "/book", {"providerId": provider_id, "date": day, "time": time_slot, "serviceType": "Repair"}
+
+    server_routes = {
+        "providers": lambda n: ("GET", provider_urls[n % len(provider_urls)], None),
+        "track": lambda n: ("GET", f"/track/{booking_ids[n % len(booking_ids)]}", None),
+        "providerDashboard": lambda n: ("GET", f"/api/provider/dashboard/{provider_ids[n % len(provider_ids)]}", None),
+        "book": book_body,
+        "login": lambda n: ("POST", "/api/login", {"email": emails[n % len(emails)], "password": "secret",
+                                                   "userType": "customer"}),
+    }
+    served = {name: drive_server(port, make_request, args.clients, args.seconds)
+              for name, make_request in server_routes.items()}
+    server.shutdown()
+    service.password_hasher.shutdown()
+
+    return {
+        "providers": args.run,
+        "startup": startup,
+        "seeded": seeded,
+        "testClient": routes,
+        "server": {"clients": args.clients, "routes": served},
+        "peakRssMb": rss_mb(),
+    }
+
+
+def compare(current, baseline):
+    """Per-route change in throughput and p95 against a previous run, in percent."""
+    def change(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+
+    old_runs = {run["providers"]: run for run in baseline["runs"]}
+    changes = {}
+    for run in current["runs"]:
+        old = old_runs.get(run["providers"])
+        if old is None:
+            continue
+        per_route = {}
+        for mode in ("testClient", "server"):
+            new_routes = run[mode] if mode == "testClient" else run[mode]["routes"]
+            old_routes = old[mode] if mode == "testClient" else old[mode]["routes"]
+            for name, result in new_routes.items():
+                if name in old_routes:
+                    per_route[f"{mode}.{name}"] = {
+                        "requestsPerSec": change(result["requestsPerSec"], old_routes[name]["requestsPerSec"]),
+                        "p95Ms": change(result["p95Ms"], old_routes[name]["p95Ms"]),
+                    }
+        changes[str(run["providers"])] = {"routes": per_route,
+                                          "peakRssMb": change(run["peakRssMb"], old["peakRssMb"])}
+    return {"baselineCommit": baseline.get("commit"), "changePercent": changes}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=2000, help="bookings made through /book before the reads")
+    parser.add_argument("--requests", type=int, default=2000, help="test client requests per route")
+    parser.add_argument("--logins", type=int, default=40, help="test client logins; each one hashes a password")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent HTTP clients against the server")
+    parser.add_argument("--seconds", type=float, default=3.0, help="HTTP load per route")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="JSON output of an earlier run to compare against")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)  # One size, in a child process
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_size(args)))
+        return
+
+    # Every size gets a fresh interpreter: the app keeps its state at module level
+    # and peak RSS can only be read per process
+    settings = {name: getattr(args, name) for name in
+                ("customers", "bookings", "requests", "logins", "clients", "seconds", "seed")}
+    child_args = [f"--{name}={value}" for name, value in settings.items()] + (["--cache"] if args.cache else [])
+    env = dict(os.environ, SERVICEHUB_STORAGE=os.environ.get("SERVICEHUB_STORAGE", "memory"))
+    runs = []
+    for size in args.sizes:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", str(size), *child_args],
+                               cwd=ROOT, env=env, capture_output=True, text=True)
+        if child.returncode != 0:
+            sys.stderr.write(child.stderr)
+            sys.exit(f"run with {size} providers failed")
+        runs.append(json.loads(child.stdout.splitlines()[-1]))
+
+    result = {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "settings": dict(settings, cache=args.cache),
+        "runs": runs,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["comparison"] = compare(result, json.load(f))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import heapq
+import threading
+from itertools import count
+
+from catalog import parse_price
+
+RECENT_BOOKINGS = 5
+
+
+class ProviderBookings:
+    """Bookings and running dashboard aggregates for one provider."""
+
+    def __init__(self):
+        self.booking_ids = []
+        self.completed = 0
+        self.earnings = 0.0
+        self.per_day = {}
+        # Min-heap of (createdAt, seq, booking_id) holding the newest bookings
+        self.recent = []
+
+
+class ProviderBookingIndex:
+    """Per-provider booking index that keeps the dashboard numbers current.
+
+    Every write to a booking's status or date must be reported here so the
+    aggregates never need a pass over the bookings.
+    """
+
+    def __init__(self, recent_size=RECENT_BOOKINGS):
+        self._recent_size = recent_size
+        self._by_provider = {}
+        self._seq = count()
+        self._lock = threading.Lock()
+
+    def get(self, provider_id):
+        return self._by_provider.get(provider_id)
+
+    def add(self, booking):
+        with self._lock:
+            entry = self._by_provider.setdefault(booking["providerId"], ProviderBookings())
+            entry.booking_ids.append(booking["id"])
+            entry.per_day[booking["date"]] = entry.per_day.get(booking["date"], 0) + 1
+
+            item = (booking["createdAt"], next(self._seq), booking["id"])
+            if len(entry.recent) < self._recent_size:
+                heapq.heappush(entry.recent, item)
+            else:
+                heapq.heappushpop(entry.recent, item)
+
+            if booking["status"] == "Completed":
+                self._completed(entry, booking, 1)
+
+    def status_changed(self, booking, old_status, new_status):
+        with self._lock:
+            entry = self._by_provider.get(booking["providerId"])
+            if entry is None or old_status == new_status:
+                return
+            if old_status == "Completed":
+                self._completed(entry, booking, -1)
+            if new_status == "Completed":
+                self._completed(entry, booking, 1)
+
+    def date_changed(self, booking, old_date, new_date):
+        with self._lock:
+            entry = self._by_provider.get(booking["providerId"])
+            if entry is None or old_date == new_date:
+                return
+            entry.per_day[old_date] -= 1
+            if not entry.per_day[old_date]:
+                del entry.per_day[old_date]
+            entry.per_day[new_date] = entry.per_day.get(new_date, 0) + 1
+
+    def recent_ids(self, provider_id):
+        with self._lock:
+            entry = self._by_provider.get(provider_id)
+            if entry is None:
+                return []
+            return [booking_id for _, _, booking_id in sorted(entry.recent, reverse=True)]
+
+    def clear(self):
+        with self._lock:
+            self._by_provider.clear()
+
+    def _completed(self, entry, booking, delta):
+        entry.completed += delta
+        entry.earnings += delta * parse_price(booking.get("price"))
+
+
+class CustomerBookingIndex:
+    """Booking ids per customer in creation order, behind /my-bookings.
+
+    Lists are append-only, so a position in one stays valid as a cursor.
+    """
+
+    def __init__(self):
+        self._by_customer = {}
+        self._lock = threading.Lock()
+
+    def add(self, booking):
+        customer_id = booking.get("customerId")
+        if customer_id is None:
+            return
+        with self._lock:
+            self._by_customer.setdefault(customer_id, []).append(booking["id"])
+
+    def count(self, customer_id):
+        return len(self._by_customer.get(customer_id, ()))
+
+    def booking_ids(self, customer_id, start, end):
+        with self._lock:
+            return self._by_customer.get(customer_id, [])[start:end]
+
+    def clear(self):
+        with self._lock:
+            self._by_customer.clear()
+
+
+class TrackingIndex:
+    """Tracking id to booking id map plus the generator for new tracking ids.
+
+    Ids are ``SH<yymmdd><seq>`` where seq counts up within the day, so two
+    bookings can never share an id and no retry loop is needed. Pass a
+    ``sequence(name)`` callable to draw seq from a store shared between
+    processes instead of the local counter.
+    """
+
+    def __init__(self, sequence=None):
+        self._booking_ids = {}
+        self._day = None
+        self._seq = count(1)
+        self._sequence = sequence
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._booking_ids)
+
+    def next_id(self, now):
+        day = now.strftime("%y%m%d")
+        if self._sequence is not None:
+            return f"SH{day}{self._sequence('tracking:' + day):03d}"
+        with self._lock:
+            if day != self._day:
+                self._day = day
+                self._seq = count(1)
+            return f"SH{day}{next(self._seq):03d}"
+
+    def add(self, tracking_id, booking_id):
+        # setdefault checks and inserts in one step
+        if self._booking_ids.setdefault(tracking_id, booking_id) != booking_id:
+            raise ValueError(f"Duplicate tracking id {tracking_id}")
+
+    def observe(self, tracking_id):
+        # Move the sequence past an id issued elsewhere, e.g. before a reload
+        day, seq = tracking_id[2:8], tracking_id[8:]
+        with self._lock:
+            if not seq.isdigit() or (self._day is not None and day < self._day):
+                return
+            if day != self._day:
+                self._day = day
+                self._seq = count(int(seq) + 1)
+            else:
+                current = next(self._seq)
+                self._seq = count(max(current, int(seq) + 1))
+
+    def get(self, tracking_id):
+        return self._booking_ids.get(tracking_id)
+
+    def clear(self):
+        self._booking_ids.clear()
@@ -0,0 +1,135 @@
+"""Streaming NDJSON and CSV input and output for the bulk import and export routes.
+
+Uploads are read a line at a time from the request body and handed on in
+batches of ``BATCH_SIZE``; exports are written by generators in chunks of
+about ``CHUNK_BYTES``. Memory therefore follows the batch and chunk sizes,
+not the size of the file.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from flask import request
+
+BATCH_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+MAX_ERRORS = 100  # Row errors reported back per upload; the rest are only counted
+NDJSON = "ndjson"
+CSV = "csv"
+MIMETYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+# CSV cells holding a list, e.g. "Pipe repair|Leak fixing"
+LIST_SEPARATOR = "|"
+# Exported text cells starting with these are prefixed with "'" so spreadsheets show them as text
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class BulkError(ValueError):
+    pass
+
+
+def input_format():
+    """``?format=`` if given, else ``csv`` for a text/csv body and ``ndjson`` otherwise."""
+    fmt = request.args.get("format") or (CSV if request.mimetype == MIMETYPES[CSV] else NDJSON)
+    if fmt not in MIMETYPES:
+        raise BulkError("format must be one of: " + ", ".join(MIMETYPES))
+    return fmt
+
+
+def output_format():
+    """``?format=`` if given, else the type the Accept header prefers, ``ndjson`` by default."""
+    fmt = request.args.get("format")
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(list(MIMETYPES.values()), MIMETYPES[NDJSON])
+        fmt = CSV if best == MIMETYPES[CSV] else NDJSON
+    if fmt not in MIMETYPES:
+        raise BulkError("format must be one of: " + ", ".join(MIMETYPES))
+    return fmt
+
+
+def read_records(stream, fmt, list_fields=()):
+    """Yield ``(line, record, error)`` for each row of an NDJSON or CSV byte stream.
+
+    ``error`` is a message for a row that could not be parsed, in which case
+    ``record`` is None. Empty CSV cells are left out of the record, and
+    cells of ``list_fields`` are split on ``LIST_SEPARATOR``.
+    """
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="" if fmt == CSV else None)
+    if fmt == CSV:
+        yield from _read_csv(text, list_fields)
+        return
+    for line, row in enumerate(text, 1):
+        if not row.strip():
+            continue
+        try:
+            record = json.loads(row)
+        except ValueError as e:
+            yield line, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(record, dict):
+            yield line, record, None
+        else:
+            yield line, None, "Each line must be a JSON object"
+
+
+def _read_csv(text, list_fields):
+    reader = csv.DictReader(text)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, None, "More cells than header columns"
+            continue
+        record = {}
+        for field, value in row.items():
+            if value is None or not value.strip():
+                continue
+            value = value.strip()
+            record[field] = [part.strip() for part in value.split(LIST_SEPARATOR)] if field in list_fields else value
+        if record:
+            yield reader.line_num, record, None
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_ndjson(records, encode):
+    """Yield ``records`` as NDJSON byte chunks; ``encode`` turns one record into bytes."""
+    chunk = bytearray()
+    for record in records:
+        chunk += encode(record)
+        chunk += b"\n"
+        if len(chunk) >= CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def write_csv(records, fields):
+    """Yield ``records`` as CSV text chunks with a header row of ``fields``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for record in records:
+        writer.writerow([_cell(record.get(field)) for field in fields])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = LIST_SEPARATOR.join(map(str, value))
+    elif isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
@@ -0,0 +1,509 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from functools import partial
+from itertools import chain, islice
+from operator import itemgetter
+
+from geo import GeoIndex
+from records import compact_provider
+from search import SearchIndex
+
+# Changes made during a text index build are replayed under the catalog lock once this few remain
+REPLAY_UNDER_LOCK = 100
+
+
+def parse_price(price_range):
+    # "₹500/hour", "₹300 - ₹800" and "$40" all resolve to their lower bound
+    if isinstance(price_range, (int, float)):
+        return float(price_range)
+    value = str(price_range or "").split(" - ")[0].split("/")[0]
+    value = value.replace("₹", "").replace("$", "").replace(",", "").strip()
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+# Sort keys always end with the provider id so every key is unique, which
+# lets cursors resume after the last key served
+SORT_KEYS = {
+    "id": lambda p: (p["id"],),
+    "rating": lambda p: (-p.get("rating", 0), p["id"]),
+    "reviews": lambda p: (-p.get("reviews", 0), p["id"]),
+    "price": lambda p: (parse_price(p.get("priceRange")), p["id"]),
+}
+
+
+def _buckets(provider):
+    category = provider.get("category")
+    location = provider.get("location")
+    return ("category", category), ("location", location), ("pair", (category, location))
+
+
+class ProviderCatalog:
+    """Provider records indexed by id, category, location, rating, coordinates and text.
+
+    Provider dicts are stored by reference, so callers must go through
+    ``update`` when changing an indexed field to keep the indexes in sync.
+    Writers and multi-index readers hold one lock, so a reader never sees a
+    provider half way between index updates.
+    """
+
+    def __init__(self, providers=()):
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._by_category = {}
+        self._by_location = {}
+        self._by_category_location = {}
+        # One sorted list of keys per entry in SORT_KEYS, for all providers and
+        # per bucket: ("category", c), ("location", l) and ("pair", (c, l))
+        self._orders = {sort: [] for sort in SORT_KEYS}
+        self._bucket_orders = {}
+        self._geo = GeoIndex()
+        self._text = None  # Built on the first search, see _text_index()
+        self._text_build_lock = threading.Lock()
+        self.version = 0  # Bumped on every change, for caches built on the catalog
+        self.add_many(providers)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, provider_id):
+        return provider_id in self._by_id
+
+    def get(self, provider_id):
+        return self._by_id.get(provider_id)
+
+    def add(self, provider):
+        provider_id = provider["id"]
+        with self._lock:
+            if provider_id in self._by_id:
+                raise ValueError(f"Duplicate provider id {provider_id}")
+            compact_provider(provider)
+            self._by_id[provider_id] = provider
+            self._index(provider)
+            self.version += 1
+
+    def add_many(self, providers):
+        """Add a batch of providers under one lock and one version bump.
+
+        Each sort order is extended and re-sorted once for the whole batch
+        rather than ``insort``-ed per provider, and the text index takes the
+        batch in one pass.
+        """
+        providers = list(providers)
+        with self._lock:
+            seen = set()
+            for provider in providers:
+                provider_id = provider["id"]
+                if provider_id in seen or provider_id in self:
+                    raise ValueError(f"Duplicate provider id {provider_id}")
+                seen.add(provider_id)
+            for provider in providers:
+                compact_provider(provider)
+                self._by_id[provider["id"]] = provider
+                self._index(provider, batch=True)
+            # Each provider's three bucket orders, looked up once for all the sorts
+            targets = {}
+            merge = {}  # Buckets that already held keys and need the batch merged in
+            for provider in providers:
+                orders = []
+                for bucket in _buckets(provider):
+                    bucket_orders = self._bucket_orders.get(bucket)
+                    if bucket_orders is None:
+                        bucket_orders = self._bucket_orders[bucket] = {sort: [] for sort in SORT_KEYS}
+                    elif bucket_orders["id"]:
+                        merge[bucket] = bucket_orders
+                    orders.append(bucket_orders)
+                targets[provider["id"]] = orders
+            for sort, key_func in SORT_KEYS.items():
+                keys = sorted(map(key_func, providers))
+                order = self._orders[sort]
+                order.extend(keys)
+                order.sort()  # Timsort merges the two runs, old keys and the sorted batch
+                # Appended in key order, so a new bucket comes out sorted
+                for key in keys:
+                    for orders in targets[key[-1]]:
+                        orders[sort].append(key)
+                for orders in merge.values():
+                    orders[sort].sort()
+            if self._text is not None:
+                self._text.add_many(providers)
+            self.version += 1
+
+    def update(self, provider_id, changes):
+        with self._lock:
+            provider = self._by_id.get(provider_id)
+            if provider is None:
+                return None
+            self._unindex(provider)
+            provider.update(changes)
+            compact_provider(provider)
+            self._index(provider)
+            self.version += 1
+            return provider
+
+    def max_id(self):
+        with self._lock:
+            order = self._orders["id"]
+            return order[-1][0] if order else 0
+
+    def categories(self):
+        # Buckets are dropped when they empty, so the keys are the distinct values
+        with self._lock:
+            return list(self._by_category)
+
+    def locations(self):
+        with self._lock:
+            return list(self._by_location)
+
+    def filter(self, category=None, location=None, min_rating=None):
+        with self._lock:
+            return self._filter(category, location, min_rating)
+
+    def _filter(self, category, location, min_rating):
+        # Start from the narrowest index so the cost follows the result size
+        if category and location:
+            candidates = self._by_category_location.get((category, location), {}).values()
+        elif category:
+            candidates = self._by_category.get(category, {}).values()
+        elif location:
+            candidates = self._by_location.get(location, {}).values()
+        elif min_rating is not None:
+            end = bisect_right(self._orders["rating"], (-min_rating, float("inf")))
+            ids = sorted(key[-1] for key in self._orders["rating"][:end])
+            return [self._by_id[provider_id] for provider_id in ids]
+        else:
+            return list(self._by_id.values())
+
+        if min_rating is None:
+            return list(candidates)
+        return [p for p in candidates if p["rating"] >= min_rating]
+
+    def page(self, category=None, location=None, min_rating=None, sort="id", after=None, limit=None):
+        """Return ``(providers, last_key)`` for one page in ``sort`` order.
+
+        ``after`` is the sort key of the last provider of the previous page.
+        ``last_key`` is None when there are no further pages.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort {sort!r}")
+        with self._lock:
+            keys = self._keys(sort, category, location)
+            start = 0 if after is None else bisect_right(keys, tuple(after))
+            if min_rating is None:
+                end = len(keys) if limit is None else min(start + limit, len(keys))
+                page = keys[start:end]
+                last_key = keys[end - 1] if end < len(keys) and end > start else None
+            else:
+                page = list(islice(self._rated(keys, start, sort, min_rating), None if limit is None else limit + 1))
+                last_key = page[limit - 1] if limit and len(page) > limit else None
+                page = page[:limit]
+            return [self._by_id[key[-1]] for key in page], last_key
+
+    def _keys(self, sort, category, location):
+        # Sorted keys of the narrowest bucket, so a page costs its own size
+        if category and location:
+            bucket = ("pair", (category, location))
+        elif category:
+            bucket = ("category", category)
+        elif location:
+            bucket = ("location", location)
+        else:
+            return self._orders[sort]
+        orders = self._bucket_orders.get(bucket)
+        return orders[sort] if orders is not None else []
+
+    def _rated(self, keys, start, sort, min_rating):
+        # Keys from ``start`` on whose provider is rated at least min_rating
+        for position in range(start, len(keys)):
+            key = keys[position]
+            if self._by_id[key[-1]]["rating"] < min_rating:
+                if sort == "rating":  # Best first, nothing further on qualifies
+                    return
+                continue
+            yield key
+
+    def nearby(self, lat, lng, radius=None, limit=20, category=None):
+        """Return ``[(provider, distance_km)]`` for providers whose service radius covers the point."""
+        with self._lock:
+            return [(self.get(provider_id), distance)
+                    for distance, provider_id in self._geo.nearby(lat, lng, radius, limit, category)]
+
+    def search(self, query, limit=20, category=None, location=None):
+        """Return ``[(provider, score)]`` for a free-text query, best match first."""
+        text = self._text_index()
+        with self._lock:
+            accept = partial(self._matches, category=category, location=location) if category or location else None
+            return [(self.get(provider_id), score)
+                    for score, provider_id in text.search(query, limit, accept)]
+
+    def _matches(self, provider_id, category, location):
+        provider = self._by_id[provider_id]
+        return ((not category or provider.get("category") == category)
+                and (not location or provider.get("location") == location))
+
+    def _index(self, provider, batch=False):
+        # add_many fills the sort orders and text index itself for a batch
+        provider_id = provider["id"]
+        category = provider.get("category")
+        location = provider.get("location")
+        self._by_category.setdefault(category, {})[provider_id] = provider
+        self._by_location.setdefault(location, {})[provider_id] = provider
+        self._by_category_location.setdefault((category, location), {})[provider_id] = provider
+        self._geo.add(provider)
+        if batch:
+            return
+        buckets = _buckets(provider)
+        for bucket in buckets:
+            self._bucket_orders.setdefault(bucket, {sort: [] for sort in SORT_KEYS})
+        for sort, key_func in SORT_KEYS.items():
+            key = key_func(provider)
+            insort(self._orders[sort], key)
+            for bucket in buckets:
+                insort(self._bucket_orders[bucket][sort], key)
+        if self._text is not None:
+            self._text.add(provider)
+
+    def _unindex(self, provider):
+        provider_id = provider["id"]
+        category = provider.get("category")
+        location = provider.get("location")
+        for index, key in ((self._by_category, category),
+                           (self._by_location, location),
+                           (self._by_category_location, (category, location))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(provider_id, None)
+                if not bucket:
+                    del index[key]
+        buckets = [self._bucket_orders.get(bucket) for bucket in _buckets(provider)]
+        for sort, key_func in SORT_KEYS.items():
+            key = key_func(provider)
+            for order in chain([self._orders[sort]], (orders[sort] for orders in buckets if orders is not None)):
+                position = bisect_left(order, key)
+                if position < len(order) and order[position] == key:
+                    del order[position]
+        for bucket in _buckets(provider):
+            orders = self._bucket_orders.get(bucket)
+            if orders is not None and not orders["id"]:
+                del self._bucket_orders[bucket]
+        self._geo.remove(provider_id)
+        if self._text is not None:
+            self._text.remove(provider_id)
+
+    def _text_index(self):
+        """Return the text index, building it on first use.
+
+        Most workers never serve a search, so startup skips tokenizing every
+        provider. The build runs outside the catalog lock so listings and
+        writes carry on meanwhile; a DeferredIndex collects their changes and
+        replays them onto the new index.
+        """
+        text = self._text
+        if text is not None and not isinstance(text, DeferredIndex):
+            return text
+        with self._text_build_lock:
+            with self._lock:
+                if self._text is not None and not isinstance(self._text, DeferredIndex):
+                    return self._text
+                self._text = DeferredIndex()
+                providers = list(self._by_id.values())
+            text = SearchIndex()
+            text.add_many(providers)
+            while True:
+                with self._lock:
+                    changes = self._text
+                    if len(changes) <= REPLAY_UNDER_LOCK:
+                        self._text = changes.replay(text)
+                        return text
+                    self._text = DeferredIndex()
+                # Catch up outside the lock until what is left is quick to replay under it
+                changes.replay(text)
+
+
+class DeferredIndex:
+    """Stands in for a GeoIndex or SearchIndex that has not been loaded yet.
+
+    Keeps the last change per provider id and replays them onto the real
+    index once it is loaded.
+    """
+
+    def __init__(self):
+        self._changes = {}  # provider id: provider to add, or None if only removed
+
+    def __len__(self):
+        return len(self._changes)
+
+    def add(self, provider):
+        self._changes[provider["id"]] = provider
+
+    def add_many(self, providers):
+        for provider in providers:
+            self.add(provider)
+
+    def remove(self, provider_id):
+        self._changes[provider_id] = None
+
+    def replay(self, index):
+        for provider_id, provider in self._changes.items():
+            index.remove(provider_id)
+            if provider is not None:
+                index.add(provider)
+        return index
+
+
+class SnapshotCatalog(ProviderCatalog):
+    """A ProviderCatalog serving the providers of a read-only CatalogSnapshot.
+
+    Snapshot providers are decoded from the mapped file when asked for, so
+    ``get`` returns a fresh dict each time. Providers added since, and
+    snapshot providers once updated, live in the inherited indexes as a
+    copy-on-write overlay; ``_shadowed`` holds the snapshot ids the overlay
+    has taken over. The snapshot's geo and text indexes are loaded on the
+    first ``nearby`` or ``search``.
+    """
+
+    def __init__(self, snapshot):
+        super().__init__()
+        self._snapshot = snapshot
+        self._shadowed = set()
+        self._geo = DeferredIndex()
+        self._text = DeferredIndex()
+
+    def __len__(self):
+        return self._snapshot.count + len(self._by_id) - len(self._shadowed)
+
+    def __iter__(self):
+        with self._lock:
+            overlay = list(self._by_id.values())
+            shadowed = set(self._shadowed)
+        snapshot = self._snapshot
+        return chain((snapshot.record(row) for row in range(snapshot.count) if snapshot.ids[row] not in shadowed),
+                     overlay)
+
+    def __contains__(self, provider_id):
+        return provider_id in self._by_id or self._snapshot.row_of(provider_id) is not None
+
+    def get(self, provider_id):
+        provider = self._by_id.get(provider_id)
+        if provider is None:
+            row = self._snapshot.row_of(provider_id)
+            if row is not None:
+                return self._snapshot.record(row)
+        return provider
+
+    def add(self, provider):
+        with self._lock:
+            if provider["id"] not in self._by_id and self._snapshot.row_of(provider["id"]) is not None:
+                raise ValueError(f"Duplicate provider id {provider['id']}")
+            super().add(provider)
+
+    def update(self, provider_id, changes):
+        with self._lock:
+            if provider_id in self._by_id:
+                return super().update(provider_id, changes)
+            row = self._snapshot.row_of(provider_id)
+            if row is None:
+                return None
+            provider = self._snapshot.record(row)
+            updated = {**provider, **changes}
+            if updated == provider:  # e.g. the row a database seeded before snapshots holds
+                return provider
+            self._shadowed.add(provider_id)
+            self._geo.remove(provider_id)
+            self._text.remove(provider_id)
+            super().add(updated)
+            return updated
+
+    def max_id(self):
+        return max(self._snapshot.max_id(), super().max_id())
+
+    def categories(self):
+        snapshot = self._snapshot
+        return self._names(snapshot.categories, [snapshot.order("id", category=name) for name in snapshot.categories],
+                           self._by_category)
+
+    def locations(self):
+        snapshot = self._snapshot
+        return self._names(snapshot.locations, [snapshot.order("id", location=name) for name in snapshot.locations],
+                           self._by_location)
+
+    def _names(self, names, buckets, overlay):
+        with self._lock:
+            ids, shadowed = self._snapshot.ids, self._shadowed
+            live = [name for name, rows in zip(names, buckets) if any(ids[row] not in shadowed for row in rows)]
+            return live + [name for name in overlay if name not in live]
+
+    def filter(self, category=None, location=None, min_rating=None):
+        return self.page(category, location, min_rating)[0]
+
+    def page(self, category=None, location=None, min_rating=None, sort="id", after=None, limit=None):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort {sort!r}")
+        with self._lock:
+            sources = []
+            rows = self._snapshot.order(sort, category, location)
+            if rows is not None:
+                keys = self._snapshot.keys(sort, rows)
+                start = 0 if after is None else bisect_right(keys, tuple(after))
+                sources.append(self._snapshot_entries(sort, rows, start, min_rating))
+            keys = self._keys(sort, category, location)
+            start = 0 if after is None else bisect_right(keys, tuple(after))
+            if min_rating is None:
+                overlay = (keys[position] for position in range(start, len(keys)))
+            else:
+                overlay = self._rated(keys, start, sort, min_rating)
+            sources.append((key, self._by_id[key[-1]], None) for key in overlay)
+            # Both sides are in key order and share no ids, so merging them gives the page
+            entries = list(islice(heapq.merge(*sources, key=itemgetter(0)), None if limit is None else limit + 1))
+            last_key = entries[limit - 1][0] if limit is not None and len(entries) > limit and limit else None
+            page = [provider if provider is not None else self._snapshot.record(row)
+                    for _, provider, row in entries[:limit]]
+            return page, last_key
+
+    def _snapshot_entries(self, sort, rows, start, min_rating):
+        snapshot, shadowed = self._snapshot, self._shadowed
+        ratings = snapshot.columns["rating"]
+        for position in range(start, len(rows)):
+            row = rows[position]
+            if min_rating is not None and ratings[row] < min_rating:
+                if sort == "rating":  # Best first, nothing further on qualifies
+                    return
+                continue
+            if snapshot.ids[row] not in shadowed:
+                yield snapshot.key(sort, row), None, row
+
+    def nearby(self, lat, lng, radius=None, limit=20, category=None):
+        with self._lock:
+            self._load_indexes()
+            return super().nearby(lat, lng, radius, limit, category)
+
+    def search(self, query, limit=20, category=None, location=None):
+        with self._lock:
+            self._load_indexes()
+            return super().search(query, limit, category, location)
+
+    def _text_index(self):
+        # The snapshot carries a built text index, its DeferredIndex is only waiting for the load
+        with self._lock:
+            self._load_indexes()
+            return self._text
+
+    def _matches(self, provider_id, category, location):
+        if provider_id in self._by_id:
+            return super()._matches(provider_id, category, location)
+        snapshot = self._snapshot
+        row = snapshot.row_of(provider_id)
+        return ((not category or snapshot.categories[snapshot.category_codes[row]] == category)
+                and (not location or snapshot.locations[snapshot.location_codes[row]] == location))
+
+    def _load_indexes(self):
+        if isinstance(self._geo, DeferredIndex):
+            geo, text = self._snapshot.load_indexes()
+            self._geo = self._geo.replay(geo)
+            self._text = self._text.replay(text)
@@ -0,0 +1,49 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip is offered
+    brotli = None
+
+MIN_SIZE = 1024  # Smaller bodies gain less than the headers and CPU cost
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Bodies compressed once and then served many times can afford the best ratio
+STORED_GZIP_LEVEL = 9
+STORED_BROTLI_QUALITY = 11
+COMPRESSIBLE = ("application/json", "text/html", "text/css", "text/plain", "application/javascript")
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def accepted_encoding():
+    """The best encoding the current request accepts, or None."""
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    return encoding if encoding in ENCODINGS else None
+
+
+def compress(body, encoding, stored=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=STORED_BROTLI_QUALITY if stored else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=STORED_GZIP_LEVEL if stored else GZIP_LEVEL, mtime=0)
+
+
+def compressible(response):
+    return (response.status_code == 200 and response.mimetype in COMPRESSIBLE
+            and not response.direct_passthrough and not response.is_streamed
+            and "Content-Encoding" not in response.headers)
+
+
+def compress_response(response):
+    """``after_request`` hook: gzip/brotli a finished body when the client accepts it."""
+    if not compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = accepted_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,17 @@
+import threading
+
+STRIPES = 64
+
+
+class StripedLock:
+    """A fixed pool of re-entrant locks handed out by key hash.
+
+    Work on the same key is serialized while work on different keys rarely
+    contends, without keeping one lock per key alive forever.
+    """
+
+    def __init__(self, stripes=STRIPES):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __call__(self, key):
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,194 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+CELL_DEGREES = 0.02  # About 2 km; queries walk outwards ring by ring and stop early
+DEFAULT_RADIUS_KM = 10.0
+
+# City centres for the locations offered at registration; providers without
+# their own coordinates are placed here
+CITY_COORDINATES = {
+    "Chennai": (13.0827, 80.2707),
+    "Coimbatore": (11.0168, 76.9558),
+    "Madurai": (9.9252, 78.1198),
+    "Tiruchirappalli": (10.7905, 78.7047),
+    "Salem": (11.6643, 78.1460),
+    "Tirunelveli": (8.7139, 77.7567),
+    "Thoothukudi": (8.7642, 78.1348),
+    "Erode": (11.3410, 77.7172),
+    "Vellore": (12.9165, 79.1325),
+    "Tanjore": (10.7870, 79.1378),
+    "Thanjavur": (10.7870, 79.1378),
+    "Dindigul": (10.3673, 77.9803),
+    "Cuddalore": (11.7480, 79.7714),
+    "Kanchipuram": (12.8342, 79.7036),
+    "Karur": (10.9601, 78.0766),
+    "Ramanathapuram": (9.3639, 78.8395),
+    "Sivaganga": (9.8433, 78.4809),
+    "Virudhunagar": (9.5680, 77.9624),
+    "Theni": (10.0104, 77.4768),
+    "Namakkal": (11.2189, 78.1674),
+    "Dharmapuri": (12.1211, 78.1582),
+    "Krishnagiri": (12.5186, 78.2137),
+    "Tiruvannamalai": (12.2253, 79.0747),
+    "Villupuram": (11.9401, 79.4861),
+    "Pudukkottai": (10.3797, 78.8205),
+    "Nagapattinam": (10.7672, 79.8449),
+    "Tiruvarur": (10.7661, 79.6344),
+    "Ariyalur": (11.1401, 79.0786),
+    "Perambalur": (11.2342, 78.8807),
+    "Nilgiris": (11.4102, 76.6950),
+    "Kanyakumari": (8.0883, 77.5385),
+}
+
+
+def parse_radius(service_radius):
+    # "10 km", "15km" and 12 all mean kilometres; anything unreadable gets the default
+    if isinstance(service_radius, (int, float)):
+        return float(service_radius)
+    value = str(service_radius or "").lower().replace("km", "").strip()
+    try:
+        return float(value)
+    except ValueError:
+        return DEFAULT_RADIUS_KM
+
+
+def provider_coordinates(provider):
+    """Return ``(lat, lng)`` for a provider, falling back to its city centre, or None."""
+    coordinates = provider.get("coordinates")
+    if isinstance(coordinates, dict):
+        try:
+            return float(coordinates["lat"]), float(coordinates["lng"])
+        except (KeyError, TypeError, ValueError):
+            pass
+    return CITY_COORDINATES.get(provider.get("location"))
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat, lng):
+    return int(math.floor(lat / CELL_DEGREES)), int(math.floor(lng / CELL_DEGREES))
+
+
+class GeoIndex:
+    """Grid of providers by coordinates for "who can reach this point" queries.
+
+    Providers at the same point and category share one bucket sorted by
+    rating, so a city full of providers placed at its centre costs a single
+    distance calculation. Not thread-safe on its own; ProviderCatalog calls
+    it under its lock.
+    """
+
+    def __init__(self):
+        self._cells = {}  # cell: {(point, category): sorted [(-rating, id)]}
+        self._entries = {}  # provider id: (cell, bucket key, sort key, radius km)
+        self._radii = Counter()  # Service radii in use, bounds how far a query looks
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, provider):
+        point = provider_coordinates(provider)
+        if point is None:
+            return
+        cell = _cell(*point)
+        bucket_key = (point, provider.get("category"))
+        sort_key = (-provider.get("rating", 0), provider["id"])
+        radius = parse_radius(provider.get("serviceRadius"))
+        insort(self._cells.setdefault(cell, {}).setdefault(bucket_key, []), sort_key)
+        self._entries[provider["id"]] = (cell, bucket_key, sort_key, radius)
+        self._radii[radius] += 1
+
+    def remove(self, provider_id):
+        entry = self._entries.pop(provider_id, None)
+        if entry is None:
+            return
+        cell, bucket_key, sort_key, radius = entry
+        buckets = self._cells[cell]
+        bucket = buckets[bucket_key]
+        del bucket[bisect_left(bucket, sort_key)]
+        if not bucket:
+            del buckets[bucket_key]
+            if not buckets:
+                del self._cells[cell]
+        self._radii[radius] -= 1
+        if not self._radii[radius]:
+            del self._radii[radius]
+
+    def nearby(self, lat, lng, radius=None, limit=20, category=None):
+        """Return up to ``limit`` ``(distance_km, provider_id)`` whose service radius covers the point.
+
+        Results are ordered by distance (to 0.1 km) and then by rating.
+        ``radius`` additionally caps how far away a provider may be.
+        """
+        if not self._radii:
+            return []
+        reach = max(self._radii)
+        if radius is not None:
+            reach = min(reach, radius)
+        lat_span = reach / KM_PER_DEGREE
+        lng_span = reach / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        min_x, min_y = _cell(lat - lat_span, lng - lng_span)
+        max_x, max_y = _cell(lat + lat_span, lng + lng_span)
+        center_x, center_y = _cell(lat, lng)
+        # Every cell outside ring r is at least r cell widths away
+        widest_lat = min(abs(lat) + lat_span, 89.0)
+        cell_km = CELL_DEGREES * KM_PER_DEGREE * min(1.0, math.cos(math.radians(widest_lat)))
+
+        candidates = []  # (rounded distance, distance, bucket)
+        rings = max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y)
+        for ring in range(rings + 1):
+            for x in range(max(center_x - ring, min_x), min(center_x + ring, max_x) + 1):
+                edge = ring if x in (center_x - ring, center_x + ring) else 0
+                step = 1 if edge else 2 * ring
+                for y in range(center_y - ring, center_y + ring + 1, step or 1):
+                    if y < min_y or y > max_y:
+                        continue
+                    for (point, bucket_category), bucket in self._cells.get((x, y), {}).items():
+                        if category and bucket_category != category:
+                            continue
+                        distance = distance_km(lat, lng, *point)
+                        if distance <= reach:
+                            candidates.append((round(distance, 1), distance, bucket))
+            if ring == rings:
+                break
+            # Unvisited cells are all at least ``bound`` away, so stop once a
+            # full page ranks strictly ahead of that distance
+            bound = ring * cell_km
+            closer = sum(len(bucket) for _, distance, bucket in candidates if distance < bound)
+            if closer >= limit:
+                results = self._take(candidates, limit)
+                if len(results) == limit and round(results[-1][0], 1) < round(bound, 1):
+                    return results
+        return self._take(candidates, limit)
+
+    def _take(self, candidates, limit):
+        candidates.sort(key=itemgetter(0))
+        results = []
+        for _, group in groupby(candidates, key=itemgetter(0)):
+            group = list(group)
+            if len(group) == 1:
+                ranked = self._ranked(group[0][2], group[0][1])
+            else:
+                ranked = heapq.merge(*(self._ranked(bucket, distance) for _, distance, bucket in group))
+            for _, provider_id, distance in ranked:
+                if distance <= self._entries[provider_id][3]:
+                    results.append((distance, provider_id))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    @staticmethod
+    def _ranked(bucket, distance):
+        for negative_rating, provider_id in bucket:
+            yield negative_rating, provider_id, distance
@@ -0,0 +1,57 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from records import Record
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib encoder is used without it
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson when it is installed.
+
+    Output keeps the default provider's sorted keys, compact separators and
+    ``default`` hook for dates and the like, but writes non-ASCII text such
+    as Tamil names, rupee signs and emoji avatars as UTF-8 rather than
+    \\u escapes. Values orjson refuses, like integers wider than 64 bits,
+    go through the stdlib encoder.
+    """
+
+    ensure_ascii = False
+    encoder = "orjson" if orjson is not None else "json"
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def encode(self, obj, pretty=False):
+        """Serialize ``obj`` to UTF-8 bytes."""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except orjson.JSONEncodeError:
+                pass
+        layout = {"indent": 2} if pretty else {"separators": (",", ":")}
+        return json.dumps(obj, default=self.default, ensure_ascii=False, sort_keys=self.sort_keys,
+                          **layout).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.encode(obj, pretty) + b"\n", mimetype=self.mimetype)
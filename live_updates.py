@@ -0,0 +1,116 @@
+import json
+import threading
+from collections import deque
+
+TRACKED_FIELDS = ("progress", "status", "eta", "providerLocation")
+HISTORY_SIZE = 32
+HEARTBEAT_SECONDS = 15.0
+FINAL_STATUSES = ("completed", "cancelled")
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+class BookingChannel:
+    """Shared fan-out point for everyone watching one booking.
+
+    Each change is diffed and encoded once; watchers only read the encoded
+    events, so adding watchers does not add serialization work.
+    """
+
+    def __init__(self, status_info):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.events = deque(maxlen=HISTORY_SIZE)  # (version, encoded event)
+        self.last = self._copy(status_info)
+        self.watchers = 0
+
+    def publish(self, status_info):
+        current = self._copy(status_info)
+        delta = {field: current[field] for field in TRACKED_FIELDS if current.get(field) != self.last.get(field)}
+        if not delta:
+            return
+        with self.condition:
+            self.last = current
+            self.version += 1
+            self.events.append((self.version, format_event("delta", delta, self.version)))
+            self.condition.notify_all()
+
+    def snapshot(self):
+        return format_event("snapshot", self.last, self.version)
+
+    def events_after(self, version):
+        # None means the watcher fell behind the history and needs a snapshot
+        if self.events and self.events[0][0] > version + 1:
+            return None
+        return [event for event_version, event in self.events if event_version > version]
+
+    @staticmethod
+    def _copy(status_info):
+        copy = {field: status_info.get(field) for field in TRACKED_FIELDS}
+        if copy["providerLocation"] is not None:
+            copy["providerLocation"] = dict(copy["providerLocation"])
+        return copy
+
+
+class LiveUpdates:
+    """Server-Sent Events for booking status changes.
+
+    Channels exist only while someone is watching, so publishing a change
+    for an unwatched booking is a single dict lookup.
+    """
+
+    def __init__(self, heartbeat_seconds=HEARTBEAT_SECONDS):
+        self.heartbeat_seconds = heartbeat_seconds
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def watcher_count(self):
+        with self._lock:
+            return sum(channel.watchers for channel in self._channels.values())
+
+    def publish(self, booking_id, status_info):
+        channel = self._channels.get(booking_id)
+        if channel is not None:
+            channel.publish(status_info)
+
+    def stream(self, booking_id, status_info, last_event_id=None):
+        """Yield SSE text for one watcher until the booking finishes."""
+        with self._lock:
+            channel = self._channels.get(booking_id)
+            if channel is None:
+                channel = self._channels[booking_id] = BookingChannel(status_info)
+            channel.watchers += 1
+        try:
+            yield "retry: 3000\n\n"
+            version = last_event_id
+            while True:
+                with channel.condition:
+                    if version is not None and version > channel.version:
+                        # Event ids from an older channel mean nothing here
+                        version = None
+                    pending = None if version is None else channel.events_after(version)
+                    if not pending and pending is not None:
+                        channel.condition.wait(self.heartbeat_seconds)
+                        pending = channel.events_after(version)
+                    if pending is None:
+                        pending = [channel.snapshot()]
+                    version = channel.version
+                    finished = channel.last["status"] in FINAL_STATUSES
+                if pending:
+                    yield from pending
+                else:
+                    yield ": keep-alive\n\n"
+                if finished:
+                    return
+        finally:
+            with self._lock:
+                channel.watchers -= 1
+                if not channel.watchers and self._channels.get(booking_id) is channel:
+                    del self._channels[booking_id]
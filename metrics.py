@@ -0,0 +1,256 @@
+import bisect
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from flask import g, request
+
+# Upper bounds in seconds, from cache hits up to slow password hashing
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+UNMATCHED = "<unmatched>"  # Route label for requests no rule matched, so 404 probes share one series
+PROFILE_HEADER = "X-Profile"
+KEEP_PROFILES = 20
+
+
+class RouteStats:
+    __slots__ = ("buckets", "total", "count", "statuses", "errors", "in_flight", "lock")
+
+    def __init__(self, size):
+        self.buckets = [0] * (size + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+class RequestTiming:
+    __slots__ = ("stats", "start", "status", "error", "profiler")
+
+    def __init__(self, stats, start):
+        self.stats = stats
+        self.start = start
+        self.status = None
+        self.error = None
+        self.profiler = None
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer while a request runs.
+
+    Stacks are kept in the folded ``frame;frame;frame count`` format that
+    flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class RequestMetrics:
+    """Per-route request counters and latency histograms in Prometheus text format.
+
+    ``install`` hooks the app so every request is timed from the first
+    ``before_request`` to teardown, labelled with its URL rule rather than
+    the raw path. Handlers that turn an exception into a 500 themselves
+    report it through ``record_error``. ``store`` registers a callable whose
+    size is read at scrape time.
+
+    With ``profiling`` on, a request sent with an ``X-Profile: 1`` header is
+    sampled by a StackSampler; the response carries ``X-Profile-Id`` and the
+    folded stacks are kept for ``profile(profile_id)``.
+    """
+
+    def __init__(self, buckets=BUCKETS, profiling=False, profile_interval=0.001, keep_profiles=KEEP_PROFILES):
+        self.bucket_bounds = buckets
+        self.profiling = profiling
+        self.profile_interval = profile_interval
+        self.keep_profiles = keep_profiles
+        self.started = time.time()
+        self._routes = {}  # (route, method): RouteStats
+        self._stores = {}  # name: callable returning the current size
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def install(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    def store(self, name, read):
+        self._stores[name] = read
+
+    def record_error(self, exc):
+        timing = g.get("metrics_timing")
+        if timing is not None:
+            timing.error = type(exc).__name__
+
+    def profile(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def _stats(self, key):
+        stats = self._routes.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._routes.setdefault(key, RouteStats(len(self.bucket_bounds)))
+        return stats
+
+    def _before(self):
+        req = request._get_current_object()
+        rule = req.url_rule
+        stats = self._stats((rule.rule if rule is not None else UNMATCHED, req.method))
+        with stats.lock:
+            stats.in_flight += 1
+        g.metrics_timing = timing = RequestTiming(stats, time.perf_counter())
+        if self.profiling and req.headers.get(PROFILE_HEADER) in ("1", "true"):
+            timing.profiler = StackSampler(threading.get_ident(), self.profile_interval)
+
+    def _after(self, response):
+        timing = g.get("metrics_timing")
+        if timing is None:
+            return response
+        timing.status = response.status_code
+        if timing.profiler is not None:
+            timing.profiler.stop()
+            profile_id = uuid.uuid4().hex[:12]
+            with self._lock:
+                self._profiles[profile_id] = timing.profiler.folded()
+                while len(self._profiles) > self.keep_profiles:
+                    self._profiles.popitem(last=False)
+            timing.profiler = None
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    def _teardown(self, exc):
+        timing = g.pop("metrics_timing", None)
+        if timing is None:
+            return
+        elapsed = time.perf_counter() - timing.start
+        if timing.profiler is not None:
+            timing.profiler.stop()
+        if exc is not None:
+            timing.error = type(exc).__name__
+            timing.status = 500
+        index = bisect.bisect_left(self.bucket_bounds, elapsed)
+        stats = timing.stats
+        with stats.lock:
+            stats.in_flight -= 1
+            stats.buckets[index] += 1
+            stats.total += elapsed
+            stats.count += 1
+            stats.statuses[timing.status] += 1
+            if timing.error is not None:
+                stats.errors[timing.error] += 1
+
+    def quantile(self, buckets, count, q):
+        # Linear interpolation inside the bucket holding the q-th request,
+        # the same estimate as PromQL's histogram_quantile
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for index, in_bucket in enumerate(buckets):
+            if seen + in_bucket >= rank and in_bucket:
+                if index == len(self.bucket_bounds):
+                    return self.bucket_bounds[-1]
+                lower = self.bucket_bounds[index - 1] if index else 0.0
+                upper = self.bucket_bounds[index]
+                return lower + (upper - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return self.bucket_bounds[-1]
+
+    def render(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+        snapshot = []
+        for key, stats in routes:
+            with stats.lock:
+                snapshot.append((key, list(stats.buckets), stats.total, stats.count, dict(stats.statuses),
+                                 dict(stats.errors), stats.in_flight))
+
+        lines = []
+
+        def family(name, kind, description):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("servicehub_requests_total", "counter", "Requests handled, by route, method and status.")
+        for (route, method), _, _, _, statuses, _, _ in snapshot:
+            for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+                lines.append(f"servicehub_requests_total{{{labels(route, method)},status=\"{status}\"}} {count}")
+
+        family("servicehub_request_errors_total", "counter", "Requests that failed with an exception, by type.")
+        for (route, method), _, _, _, _, errors, _ in snapshot:
+            for error, count in sorted(errors.items()):
+                lines.append(f"servicehub_request_errors_total{{{labels(route, method)},"
+                             f"exception=\"{escape(error)}\"}} {count}")
+
+        family("servicehub_requests_in_flight", "gauge", "Requests currently being served.")
+        for (route, method), _, _, _, _, _, in_flight in snapshot:
+            lines.append(f"servicehub_requests_in_flight{{{labels(route, method)}}} {in_flight}")
+
+        family("servicehub_request_duration_seconds", "histogram", "Time from routing to teardown.")
+        for (route, method), buckets, total, count, _, _, _ in snapshot:
+            route_labels = labels(route, method)
+            cumulative = 0
+            for bound, in_bucket in zip(self.bucket_bounds + ("+Inf",), buckets):
+                cumulative += in_bucket
+                lines.append(f"servicehub_request_duration_seconds_bucket{{{route_labels},le=\"{bound}\"}} "
+                             f"{cumulative}")
+            lines.append(f"servicehub_request_duration_seconds_sum{{{route_labels}}} {total:.6f}")
+            lines.append(f"servicehub_request_duration_seconds_count{{{route_labels}}} {count}")
+
+        family("servicehub_request_duration_quantile_seconds", "gauge",
+               "Latency quantiles estimated from the duration histogram.")
+        for (route, method), buckets, _, count, _, _, _ in snapshot:
+            for q in QUANTILES:
+                value = self.quantile(buckets, count, q)
+                if value is not None:
+                    lines.append(f"servicehub_request_duration_quantile_seconds{{{labels(route, method)},"
+                                 f"quantile=\"{q}\"}} {value:.6f}")
+
+        family("servicehub_store_size", "gauge", "Records held in the in-memory stores.")
+        for name, read in sorted(self._stores.items()):
+            lines.append(f"servicehub_store_size{{store=\"{escape(name)}\"}} {read()}")
+
+        family("servicehub_start_time_seconds", "gauge", "Unix time the process started serving.")
+        lines.append(f"servicehub_start_time_seconds {self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def labels(route, method):
+    return f"route=\"{escape(route)}\",method=\"{method}\""
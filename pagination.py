@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Length of the key a cursor carries for each sort: numbers, ending with the
+# int id of the last item (or, for createdAt, its position in the history)
+KEY_LENGTHS = {"id": 1, "rating": 2, "reviews": 2, "price": 2, "createdAt": 1}
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(sort, key):
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    # Cursors are opaque keyset positions: the sort key of the last item served
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error):
+        raise PaginationError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(key, list):
+        raise PaginationError("Cursor does not match the requested sort")
+    if (len(key) != KEY_LENGTHS.get(sort, len(key)) or not key
+            or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in key)
+            or not isinstance(key[-1], int)):
+        raise PaginationError("Invalid cursor")
+    return tuple(key)
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(value):
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    return fields or None
+
+
+def project(record, fields, always=("id",)):
+    if fields is None:
+        return record
+    return {field: record[field] for field in (*always, *fields) if field in record}
@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt"
+QUEUE_PER_WORKER = 8
+
+
+class HasherBusy(Exception):
+    """The hashing queue is full; the request should be retried later."""
+
+
+def _verify(pwhash, password, method, prefix):
+    # Module level so a process pool can pickle it
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split("$", 1)[0] != prefix:
+        return True, generate_password_hash(password, method)
+    return True, None
+
+
+class PasswordHasher:
+    """Runs password hashing on a bounded pool instead of the request thread.
+
+    hashlib releases the GIL while it hashes, so a thread pool keeps other
+    requests moving; ``processes=True`` isolates the work completely. At most
+    ``workers + max_pending`` hashes are in flight, beyond that calls raise
+    ``HasherBusy`` straight away rather than queueing without limit.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=None, max_pending=None, processes=False):
+        self.method = method
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers * QUEUE_PER_WORKER if max_pending is None else max_pending
+        self.processes = processes
+        self.rejected = 0
+        self.rehashed = 0
+        # Hashes made with other parameters carry a different "method:params" prefix
+        self._prefix = generate_password_hash("", method).split("$", 1)[0]
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """Hash a batch, keeping at most ``workers`` of its hashes in flight.
+
+        Waits for room rather than raising ``HasherBusy``, and never takes
+        the queue slots interactive logins rely on.
+        """
+        batch = threading.BoundedSemaphore(self.workers)
+
+        def done(_):
+            self._slots.release()
+            batch.release()
+
+        futures = []
+        for password in passwords:
+            batch.acquire()
+            self._slots.acquire()
+            future = self._executor().submit(generate_password_hash, password, self.method)
+            future.add_done_callback(done)
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def verify(self, pwhash, password):
+        """Return ``(matches, new_hash)``; new_hash is set when the stored hash should be upgraded."""
+        matches, new_hash = self._run(_verify, pwhash, password, self.method, self._prefix)
+        if new_hash is not None:
+            self.rehashed += 1
+        return matches, new_hash
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy("Too many password checks in progress")
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _executor(self):
+        # Created on first use so forked worker processes each build their own
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.processes:
+                        self._pool = ProcessPoolExecutor(self.workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+        return self._pool
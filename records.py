@@ -0,0 +1,194 @@
+import re
+import sys
+import time
+from collections.abc import MutableMapping
+from datetime import datetime
+
+EPOCH = datetime(1970, 1, 1)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+PRICE = re.compile(r"₹([1-9]\d*|0)")
+# Provider fields drawn from a small vocabulary; one shared string per value
+# instead of a copy per provider loaded from storage or registered
+PROVIDER_TEXT_FIELDS = ("category", "location", "avatar", "experience", "serviceRadius")
+PROVIDER_TEXT_LISTS = ("services", "workingDays")
+
+
+def intern_text(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def encode_price(value):
+    # "₹500" becomes 500; anything else is kept as given
+    match = PRICE.fullmatch(value) if type(value) is str else None
+    return int(match.group(1)) if match else value
+
+
+def decode_price(value):
+    return f"₹{value}" if type(value) is int else value
+
+
+def encode_timestamp(value):
+    # "2026-10-17 09:30:00" becomes seconds since 1970 on the same wall clock,
+    # so the string comes back exactly regardless of the server's time zone
+    if type(value) is not str or len(value) != 19 or value[10] != " ":
+        return value
+    try:
+        seconds = int((datetime.fromisoformat(value) - EPOCH).total_seconds())
+    except (ValueError, TypeError):  # Not a date, or one with a UTC offset
+        return value
+    return seconds if decode_timestamp(seconds) == value else value
+
+
+def decode_timestamp(value):
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(value)) if type(value) is int else value
+
+
+class Record(MutableMapping):
+    """A fixed set of fields in ``__slots__`` that reads and writes like the dict it replaces.
+
+    Subclasses list their keys in FIELDS and may give a key an
+    ``(encode, decode)`` pair in CODECS for a cheaper stored form. Keys never
+    set are absent, as in a dict, and unknown keys go to a side dict so
+    nothing loaded from storage is dropped. ``to_dict`` is what the API and
+    storage serialize.
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS = ()
+    KEYS = frozenset()
+    CODECS = {}
+
+    def __init__(self, data=None):
+        self._extra = None
+        if data is not None:
+            keys, codecs = self.KEYS, self.CODECS
+            for key, value in data.items():
+                if key in keys:
+                    codec = codecs.get(key)
+                    setattr(self, key, codec[0](value) if codec is not None else value)
+                else:
+                    self[key] = value
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.KEYS = frozenset(cls.FIELDS)
+
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            codec = self.CODECS.get(key)
+            return codec[1](value) if codec is not None else value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.KEYS:
+            codec = self.CODECS.get(key)
+            setattr(self, key, codec[0](value) if codec is not None else value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.KEYS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self.KEYS:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self):
+        data = {}
+        codecs = self.CODECS
+        for key in self.FIELDS:
+            try:
+                value = getattr(self, key)
+            except AttributeError:
+                continue
+            codec = codecs.get(key)
+            data[key] = codec[1](value) if codec is not None else value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    @classmethod
+    def of(cls, data):
+        """``data`` itself if it is already this record type, otherwise a converted copy."""
+        if data is None or isinstance(data, cls):
+            return data
+        return cls(data)
+
+
+TEXT = (intern_text, lambda value: value)
+PRICE_CODEC = (encode_price, decode_price)
+TIMESTAMP = (encode_timestamp, decode_timestamp)
+
+
+class Booking(Record):
+    FIELDS = ("id", "trackingId", "providerId", "providerName", "serviceType", "date", "time", "description",
+              "phone", "location", "price", "status", "customerId", "createdAt")
+    __slots__ = FIELDS
+    # Names, dates, times and statuses repeat across bookings and share one string each
+    CODECS = {"providerName": TEXT, "serviceType": TEXT, "date": TEXT, "time": TEXT, "location": TEXT,
+              "status": TEXT, "price": PRICE_CODEC, "createdAt": TIMESTAMP}
+
+
+class Location(Record):
+    FIELDS = ("lat", "lng")
+    __slots__ = FIELDS
+
+
+class BookingStatus(Record):
+    FIELDS = ("status", "progress", "providerLocation", "eta", "lastUpdated")
+    __slots__ = FIELDS
+    # The location stays a record of its own so the status engine can nudge it in place
+    CODECS = {"status": TEXT, "eta": TEXT, "lastUpdated": TIMESTAMP,
+              "providerLocation": (Location.of, lambda value: value)}
+
+
+def compact_provider(provider):
+    """Intern the repeated strings in a provider dict, in place."""
+    for field in PROVIDER_TEXT_FIELDS:
+        if type(provider.get(field)) is str:
+            provider[field] = sys.intern(provider[field])
+    for field in PROVIDER_TEXT_LISTS:
+        values = provider.get(field)
+        if type(values) is list:
+            provider[field] = [intern_text(value) for value in values]
+    hours = provider.get("workingHours")
+    if type(hours) is dict:
+        provider["workingHours"] = {key: intern_text(value) for key, value in hours.items()}
+    return provider
+
+
+def to_json(value):
+    """``default`` hook for json.dumps and orjson."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,148 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+from compression import COMPRESSIBLE, MIN_SIZE, accepted_encoding, compress
+
+MAX_BYTES = 32 * 1024 * 1024
+ENTRY_OVERHEAD = 512  # Rough per-entry cost of the key, headers and bookkeeping
+
+
+class CachedResponse:
+    __slots__ = ("key", "version", "body", "status", "mimetype", "etag", "size", "encoded")
+
+    def __init__(self, key, version, body, status, mimetype):
+        self.key = key
+        self.version = version
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.size = len(body) + ENTRY_OVERHEAD
+        self.encoded = {}  # Content-Encoding: body compressed once on first request
+
+    def compressible(self):
+        return self.mimetype in COMPRESSIBLE and len(self.body) >= MIN_SIZE
+
+
+class ResponseCache:
+    """LRU cache of rendered GET responses with ETag revalidation.
+
+    Views opt in with ``@response_cache.cached(version)``. Entries are keyed by
+    path and sorted query arguments and remember the ``version()`` they were
+    rendered at, so bumping the version invalidates everything at once
+    without walking the cache. Total body size is capped at ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, max_age=0, enabled=True):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "notModified": self.not_modified,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cached(self, version):
+        def decorate(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                # Read the version before rendering; a change mid-render only
+                # leaves behind an entry that is already stale
+                current = version()
+                entry = self._get(key, current)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    entry = CachedResponse(key, current, response.get_data(), response.status_code,
+                                           response.mimetype)
+                    self._put(entry)
+                return self._respond(entry)
+            return wrapper
+        return decorate
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def _put(self, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[entry.key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def _respond(self, entry):
+        encoding = accepted_encoding() if entry.compressible() else None
+        # Each encoding is a different representation and needs its own ETag
+        etag = entry.etag if encoding is None else f"{entry.etag}-{encoding}"
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+        }
+        if entry.compressible():
+            headers["Vary"] = "Accept-Encoding"
+        if request.if_none_match.contains(etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status=304, headers=headers)
+        if encoding is None:
+            return Response(entry.body, status=entry.status, mimetype=entry.mimetype, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(self._encoded(entry, encoding), status=entry.status, mimetype=entry.mimetype,
+                        headers=headers)
+
+    def _encoded(self, entry, encoding):
+        body = entry.encoded.get(encoding)
+        if body is None:
+            body = entry.encoded[encoding] = compress(entry.body, encoding, stored=True)
+            with self._lock:
+                # Count it against the cap if the entry is still cached
+                if self._entries.get(entry.key) is entry:
+                    entry.size += len(body)
+                    self._bytes += len(body)
+        return body
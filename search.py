@@ -0,0 +1,300 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Term frequency multiplier per provider field
+FIELD_WEIGHTS = {
+    "name": 2.0,
+    "category": 2.0,
+    "services": 2.0,
+    "location": 1.5,
+    "description": 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+MAX_PREFIX_TERMS = 32
+PENDING_LIMIT = 256  # Unsorted additions per term before it is re-sorted
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def _field_text(value):
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return value
+
+
+def _terms(provider):
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(_field_text(provider.get(field))):
+            terms[token] += weight
+    return terms
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance between a and b, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def allowed_typos(token):
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class SearchIndex:
+    """Inverted index over provider text with BM25 ranking.
+
+    Query words match terms exactly, by prefix (so "plumb" finds "plumber")
+    or within one or two typos (so "coimbatre" finds "coimbatore"). Typo
+    candidates come from a map of single-character deletions of every term,
+    which stays proportional to the vocabulary rather than the providers.
+
+    Each posting stores its BM25 impact, and every term also keeps its
+    postings sorted by impact, so a query walks the best postings first and
+    stops as soon as nothing further down can reach the top results. Not
+    thread-safe on its own; ProviderCatalog calls it under its lock.
+    """
+
+    def __init__(self):
+        self._postings = {}  # term: {provider id: BM25 impact}
+        self._ranked = {}  # term: [(-impact, provider id)] sorted, may hold stale entries
+        self._pending = {}  # term: [(-impact, provider id)] added since the last sort
+        self._stale = Counter()  # term: entries in _ranked no longer in _postings
+        self._documents = {}  # provider id: Counter of its terms
+        self._lengths = {}  # provider id: weighted length
+        self._total_length = 0.0
+        # Impacts are computed against this average; they are recomputed when
+        # the real average drifts too far from it
+        self._average_length = None
+        self._terms = []  # Sorted vocabulary for prefix lookups
+        self._deletes = {}  # term with one character removed: set of terms
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, provider):
+        terms = _terms(provider)
+        provider_id = provider["id"]
+        self._documents[provider_id] = terms
+        self._lengths[provider_id] = length = sum(terms.values())
+        self._total_length += length
+        if self._reweigh_needed():
+            self._reweigh()
+            return
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._ranked[term] = []
+                self._pending[term] = []
+                self._add_term(term)
+            postings[provider_id] = impact = self._impact(frequency, length)
+            self._pending[term].append((-impact, provider_id))
+
+    def add_many(self, providers):
+        """Add a batch of providers; a large one is indexed in a single pass.
+
+        Weighing every posting once against the final average length beats
+        adding one provider at a time, which re-sorts postings and reweighs
+        the whole index each time the average drifts.
+        """
+        providers = list(providers)
+        if len(providers) * 4 < len(self._documents):
+            for provider in providers:
+                self.add(provider)
+            return
+        for provider in providers:
+            self.remove(provider["id"])
+            terms = _terms(provider)
+            self._documents[provider["id"]] = terms
+            self._lengths[provider["id"]] = length = sum(terms.values())
+            self._total_length += length
+        if self._documents:
+            self._reweigh()
+
+    def remove(self, provider_id):
+        terms = self._documents.pop(provider_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(provider_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[provider_id]
+            if not postings:
+                del self._postings[term], self._ranked[term], self._pending[term], self._stale[term]
+                self._remove_term(term)
+            else:
+                self._stale[term] += 1
+
+    def search(self, query, limit=20, accept=None):
+        """Return up to ``limit`` ``(score, provider_id)``, best first.
+
+        ``accept(provider_id)`` can reject results, e.g. to apply filters.
+        """
+        if not self._documents:
+            return []
+        total = len(self._documents)
+        words = []  # One [(factor, postings)] per query word
+        for token in dict.fromkeys(tokenize(query)):
+            expansions = []
+            for term, weight in self._expand(token):
+                postings = self._postings[term]
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                expansions.append((weight * idf, term))
+            if expansions:
+                words.append(expansions)
+        if not words:
+            return []
+
+        streams = [self._stream(expansions) for expansions in words]
+        frontier = [float("inf")] * len(streams)
+        seen = set()
+        top = []  # Min-heap of (score, -provider id)
+        while True:
+            exhausted = True
+            for i, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    frontier[i] = 0.0
+                    continue
+                exhausted = False
+                frontier[i], provider_id = item
+                if provider_id in seen:
+                    continue
+                seen.add(provider_id)
+                if accept is not None and not accept(provider_id):
+                    continue
+                score = sum(self._word_score(expansions, provider_id) for expansions in words)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, -provider_id))
+                elif (score, -provider_id) > top[0]:
+                    heapq.heapreplace(top, (score, -provider_id))
+            # Nothing unseen can score more than the sum of the frontiers
+            if exhausted or (len(top) == limit and top[0][0] >= sum(frontier)):
+                break
+        return [(score, -negative_id) for score, negative_id in sorted(top, reverse=True)]
+
+    def _stream(self, expansions):
+        """Yield ``(word score, provider_id)`` for one query word, best first."""
+        return heapq.merge(*(self._term_stream(factor, term) for factor, term in expansions), reverse=True)
+
+    def _term_stream(self, factor, term):
+        postings = self._postings[term]
+        for negative_impact, provider_id in self._sorted(term):
+            # Skip entries left behind by removals and updates
+            if postings.get(provider_id) == -negative_impact:
+                yield -negative_impact * factor, provider_id
+
+    def _sorted(self, term):
+        ranked = self._ranked[term]
+        pending = self._pending[term]
+        if self._stale[term] * 4 > len(ranked) or len(pending) > PENDING_LIMIT:
+            # Fold everything into one freshly sorted list
+            ranked = [(-impact, provider_id) for provider_id, impact in self._postings[term].items()]
+            ranked.sort()
+            self._ranked[term] = ranked
+            self._pending[term] = []
+            self._stale[term] = 0
+            return ranked
+        if not pending:
+            return ranked
+        # A few recent additions are merged on the fly rather than re-sorting
+        pending.sort()
+        return heapq.merge(ranked, pending)
+
+    def _word_score(self, expansions, provider_id):
+        best = 0.0
+        for factor, term in expansions:
+            impact = self._postings[term].get(provider_id)
+            if impact is not None and impact * factor > best:
+                best = impact * factor
+        return best
+
+    def _impact(self, frequency, length):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._average_length)
+        return frequency * (BM25_K1 + 1) / (frequency + norm)
+
+    def _reweigh_needed(self):
+        average = self._total_length / len(self._documents)
+        return self._average_length is None or abs(average - self._average_length) > 0.1 * self._average_length
+
+    def _reweigh(self):
+        self._average_length = self._total_length / len(self._documents)
+        for provider_id, terms in self._documents.items():
+            length = self._lengths[provider_id]
+            for term, frequency in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._add_term(term)
+                postings[provider_id] = self._impact(frequency, length)
+        for term, postings in self._postings.items():
+            self._ranked[term] = sorted((-impact, provider_id) for provider_id, impact in postings.items())
+            self._pending[term] = []
+            self._stale[term] = 0
+
+    def _expand(self, token):
+        """Yield ``(term, weight)`` for every indexed term the query word should match."""
+        matched = {}
+        if token in self._postings:
+            matched[token] = 1.0
+        start = bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_TERMS + 1]:
+            if not term.startswith(token):
+                break
+            matched.setdefault(term, PREFIX_WEIGHT)
+        typos = allowed_typos(token)
+        if typos:
+            candidates = set(self._deletes.get(token, ()))
+            for variant in _deletes(token):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for term in candidates:
+                if term not in matched and edit_distance(token, term, typos) <= typos:
+                    matched[term] = FUZZY_WEIGHT
+        return matched.items()
+
+    def _add_term(self, term):
+        insort(self._terms, term)
+        if len(term) >= 3:
+            for variant in _deletes(term):
+                self._deletes.setdefault(variant, set()).add(term)
+
+    def _remove_term(self, term):
+        del self._terms[bisect_left(self._terms, term)]
+        if len(term) >= 3:
+            for variant in _deletes(term):
+                terms = self._deletes.get(variant)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._deletes[variant]
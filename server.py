@@ -0,0 +1,107 @@
+"""Multi-process production server that needs nothing beyond the app's own dependencies.
+
+    python server.py --workers 4 --port 8000 --db servicehub.db
+
+The parent binds the listening socket and forks ``--workers`` processes that
+all accept from it, so requests spread across cores. Workers share state
+through one SQLite database in WAL mode: every write lands in a change log
+that the other workers replay before each request and from a background
+thread, ids and tracking numbers come from sequences in the database, and
+one worker at a time (whoever holds the lead lock) runs the booking status
+engine. Crashed workers are restarted. A SERVICEHUB_STORAGE set beforehand
+must name a shared database (``sqlite:///path.db?shared=1``) when there is
+more than one worker.
+
+To scale, run one worker per core (the default). For gunicorn or another WSGI
+server, point it at ``wsgi:application`` with the same SERVICEHUB_STORAGE
+setting instead.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from storage import is_shared
+
+
+def serve(sock, threads):
+    # Imported after the fork so each worker opens its own database connection
+    from werkzeug.serving import make_server
+
+    import wsgi
+
+    server = make_server(sock.getsockname()[0], sock.getsockname()[1], wsgi.application,
+                         threaded=threads, fd=sock.fileno())
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server.serve_forever()
+
+
+def spawn(sock, threads):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            serve(sock, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", default="servicehub.db", help="SQLite file shared by the workers")
+    parser.add_argument("--no-threads", action="store_true", help="handle one request at a time per worker")
+    args = parser.parse_args()
+
+    storage_url = os.environ.setdefault("SERVICEHUB_STORAGE", f"sqlite:///{args.db}?shared=1")
+    # Workers on separate stores would each serve their own diverging copy of the data
+    if args.workers > 1 and not is_shared(storage_url):
+        parser.error(f"SERVICEHUB_STORAGE={storage_url!r} cannot be shared by {args.workers} workers; "
+                     "use sqlite:///path.db?shared=1 or --workers 1")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(message)s")
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    workers = {spawn(sock, not args.no_threads) for _ in range(args.workers)}
+    logging.info("Serving on %s:%d with %d workers", args.host, args.port, len(workers))
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            logging.warning("Worker %d exited with status %d, restarting", pid, status)
+            time.sleep(0.5)
+            workers.add(spawn(sock, not args.no_threads))
+
+
+if __name__ == "__main__":
+    main()
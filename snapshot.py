@@ -0,0 +1,250 @@
+"""Prebuilt, memory-mapped snapshot of the bundled provider catalog.
+
+Importing the dataset module and indexing it costs every worker seconds of
+CPU and its own copy of every provider. A snapshot holds the providers as
+JSON records plus the sorted orders and buckets the catalog would build, in
+flat arrays that are read straight out of the mapped file; the pages are
+shared by every process that maps it. The geo and text indexes are pickled
+alongside and only loaded on the first query that needs them.
+
+    python snapshot.py --output providers.snapshot
+    SERVICEHUB_SNAPSHOT=providers.snapshot python server.py
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from catalog import ProviderCatalog, SORT_KEYS, parse_price
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAGIC = b"SHSNAP01"
+PREFIX = struct.Struct("<8sQ")  # Magic, header length
+ALIGN = 8
+DATASET = "tamilnadu_workers_6types"
+# Columns the sort keys are computed from, so paging never decodes a record
+COLUMNS = {"rating": "d", "reviews": "d", "price": "d"}
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def dataset_source(module=DATASET):
+    """Size and mtime of the dataset module's file, without importing it."""
+    spec = importlib.util.find_spec(module)
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        return None
+    stat = os.stat(spec.origin)
+    return {"module": module, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def _dumps(provider):
+    # The same bytes storage writes for a provider
+    return json.dumps(provider, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_snapshot(providers, path, source=None):
+    """Index ``providers`` and write them to a snapshot file at ``path``."""
+    catalog = ProviderCatalog(dict(provider) for provider in providers)
+    rows = sorted(catalog, key=lambda p: p["id"])
+    row_of = {provider["id"]: row for row, provider in enumerate(rows)}
+    categories = catalog.categories()
+    locations = catalog.locations()
+    pairs = list(catalog._by_category_location)
+
+    sections = {}
+    records = bytearray()
+    offsets = array("Q", [0])
+    for provider in rows:
+        records += _dumps(provider)
+        offsets.append(len(records))
+    sections["records"] = bytes(records)
+    sections["offsets"] = offsets
+    sections["ids"] = array("q", (provider["id"] for provider in rows))
+    sections["rating"] = array("d", (float(provider.get("rating", 0)) for provider in rows))
+    sections["reviews"] = array("d", (float(provider.get("reviews", 0)) for provider in rows))
+    sections["price"] = array("d", (parse_price(provider.get("priceRange")) for provider in rows))
+    sections["category"] = array("H", (categories.index(provider.get("category")) for provider in rows))
+    sections["location"] = array("H", (locations.index(provider.get("location")) for provider in rows))
+
+    def orders(name, bucket):
+        for sort, key_func in SORT_KEYS.items():
+            ordered = sorted(bucket, key=key_func)
+            sections[f"{name}/{sort}"] = array("I", (row_of[provider["id"]] for provider in ordered))
+
+    orders("all", rows)
+    for number, category in enumerate(categories):
+        orders(f"category/{number}", catalog._by_category[category].values())
+    for number, location in enumerate(locations):
+        orders(f"location/{number}", catalog._by_location[location].values())
+    for number, pair in enumerate(pairs):
+        orders(f"pair/{number}", catalog._by_category_location[pair].values())
+    sections["indexes"] = pickle.dumps((catalog._geo, catalog._text_index()), protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Section offsets depend on the header length, which depends on the offsets;
+    # sizing the header with every offset at its widest settles it in one pass
+    layout = {name: [0, len(bytes(data)) if isinstance(data, array) else len(data),
+                     data.typecode if isinstance(data, array) else ""]
+              for name, data in sections.items()}
+    header = {"version": 1, "byteorder": sys.byteorder, "count": len(rows), "source": source,
+              "categories": categories, "locations": locations, "pairs": pairs, "sections": layout}
+    for entry in layout.values():
+        entry[0] = 2 ** 63
+    position = _aligned(PREFIX.size + len(json.dumps(header).encode("utf-8")))
+    for entry in layout.values():
+        entry[0] = position
+        position = _aligned(position + entry[1])
+    encoded = json.dumps(header).encode("utf-8")
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, data in sections.items():
+            f.write(b"\0" * (layout[name][0] - f.tell()))
+            f.write(data.tobytes() if isinstance(data, array) else data)
+    os.replace(temporary, path)  # Workers starting meanwhile see the old file or the new one
+    return len(rows)
+
+
+def _aligned(position):
+    return -(-position // ALIGN) * ALIGN
+
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file.
+
+    Providers are addressed by row, which is their position in id order.
+    ``record`` decodes a fresh dict on every call.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length = PREFIX.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a provider snapshot")
+        self.header = json.loads(self._map[PREFIX.size:PREFIX.size + length])
+        if self.header["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"{path} was built on a {self.header['byteorder']}-endian machine")
+        view = memoryview(self._map)
+        self._sections = {}
+        for name, (offset, size, typecode) in self.header["sections"].items():
+            section = view[offset:offset + size]
+            self._sections[name] = section.cast(typecode) if typecode else section
+        self.count = self.header["count"]
+        self.categories = self.header["categories"]
+        self.locations = self.header["locations"]
+        self._category_numbers = {name: number for number, name in enumerate(self.categories)}
+        self._location_numbers = {name: number for number, name in enumerate(self.locations)}
+        self._pair_numbers = {tuple(pair): number for number, pair in enumerate(self.header["pairs"])}
+        self.ids = self._sections["ids"]
+        self.category_codes = self._sections["category"]
+        self.location_codes = self._sections["location"]
+        self.columns = {name: self._sections[name] for name in COLUMNS}
+        self._records = self._sections["records"]
+        self._offsets = self._sections["offsets"]
+
+    def __len__(self):
+        return self.count
+
+    def max_id(self):
+        return self.ids[-1] if self.count else 0
+
+    def row_of(self, provider_id):
+        if type(provider_id) is not int:
+            return None
+        row = bisect_left(self.ids, provider_id)
+        return row if row < self.count and self.ids[row] == provider_id else None
+
+    def record(self, row):
+        data = self._records[self._offsets[row]:self._offsets[row + 1]]
+        return orjson.loads(data) if orjson is not None else json.loads(bytes(data))
+
+    def key(self, sort, row):
+        """The SORT_KEYS key of the provider at ``row``."""
+        provider_id = self.ids[row]
+        if sort == "id":
+            return (provider_id,)
+        value = self.columns[sort][row]
+        return (value if sort == "price" else -value, provider_id)
+
+    def keys(self, sort, rows):
+        """The keys of ``rows`` as a sequence ``bisect`` can search."""
+        return RowKeys(self, sort, rows)
+
+    def order(self, sort, category=None, location=None):
+        """Rows in ``sort`` order, narrowed to a category and/or location; None if nothing matches."""
+        if category and location:
+            number = self._pair_numbers.get((category, location))
+            name = "pair"
+        elif category:
+            number = self._category_numbers.get(category)
+            name = "category"
+        elif location:
+            number = self._location_numbers.get(location)
+            name = "location"
+        else:
+            return self._sections[f"all/{sort}"]
+        return None if number is None else self._sections[f"{name}/{number}/{sort}"]
+
+    def load_indexes(self):
+        """Unpickle the ``(GeoIndex, SearchIndex)`` built with the snapshot."""
+        return pickle.loads(self._sections["indexes"])
+
+
+class RowKeys:
+    """Sort keys of snapshot rows, computed as they are indexed."""
+
+    def __init__(self, snapshot, sort, rows):
+        self.snapshot = snapshot
+        self.sort = sort
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, position):
+        return self.snapshot.key(self.sort, self.rows[position])
+
+
+def open_snapshot(path, module=DATASET):
+    """Map the snapshot at ``path``, or return None if there is none or the dataset has changed since."""
+    if not path:
+        return None
+    snapshot = CatalogSnapshot(path)
+    source = snapshot.header.get("source")
+    if source is not None and source != dataset_source(source["module"]):
+        logger.warning("%s is older than the %s dataset; rebuild it with snapshot.py", path, source["module"])
+        return None
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a provider catalog snapshot from the bundled dataset.")
+    parser.add_argument("--output", default="providers.snapshot")
+    parser.add_argument("--module", default=DATASET)
+    args = parser.parse_args()
+    source = dataset_source(args.module)
+    count = build_snapshot(importlib.import_module(args.module).providers, args.output, source)
+    print(json.dumps({"snapshot": args.output, "providers": count, "bytes": os.path.getsize(args.output)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading
+from collections import Counter
+
+CLOSED_STATUSES = ("Completed", "Cancelled")
+CHECK_ATTEMPTS = 5
+
+
+class StatsCounters:
+    """Running totals behind /api/stats, updated on every write.
+
+    ``recount`` rebuilds the same numbers with full passes over the stores so
+    the two can be compared.
+    """
+
+    def __init__(self):
+        self.bookings_by_status = Counter()
+        self.users_by_type = Counter()
+        self._lock = threading.Lock()
+
+    def record_booking_status(self, old_status, new_status):
+        # old_status is None for a new booking, new_status None for a removed one
+        if old_status == new_status:
+            return
+        with self._lock:
+            if old_status is not None:
+                self.bookings_by_status[old_status] -= 1
+            if new_status is not None:
+                self.bookings_by_status[new_status] += 1
+
+    def record_user(self, user_type):
+        with self._lock:
+            self.users_by_type[user_type] += 1
+
+    def clear_bookings(self):
+        with self._lock:
+            self.bookings_by_status.clear()
+
+    def stats(self, total_providers):
+        with self._lock:
+            total_bookings = sum(self.bookings_by_status.values())
+            closed = sum(self.bookings_by_status[status] for status in CLOSED_STATUSES)
+            return {
+                "totalProviders": total_providers,
+                "totalBookings": total_bookings,
+                "activeBookings": total_bookings - closed,
+                "completedBookings": self.bookings_by_status["Completed"],
+                "registeredCustomers": self.users_by_type["customer"],
+                "registeredProviders": self.users_by_type["provider"]
+            }
+
+    @staticmethod
+    def recount(bookings, users, total_providers):
+        # Snapshot first, other threads keep inserting while we count
+        bookings = dict(bookings)
+        users = dict(users)
+        return {
+            "totalProviders": total_providers,
+            "totalBookings": len(bookings),
+            "activeBookings": len([b for b in bookings.values() if b["status"] not in CLOSED_STATUSES]),
+            "completedBookings": len([b for b in bookings.values() if b["status"] == "Completed"]),
+            "registeredCustomers": len([u for u in users.values() if u["userType"] == "customer"]),
+            "registeredProviders": len([u for u in users.values() if u["userType"] == "provider"])
+        }
+
+    def check(self, bookings, users, total_providers, attempts=CHECK_ATTEMPTS):
+        """Return ``{stat: {"counter": x, "recount": y}}`` for every stat that disagrees.
+
+        Writes landing between reading the counters and recounting would show
+        up as drift, so the recount is only trusted when the counters read the
+        same before and after it; otherwise it is retried.
+        """
+        counted = self.stats(total_providers)
+        for _ in range(attempts):
+            recounted = self.recount(bookings, users, total_providers)
+            after = self.stats(total_providers)
+            if after == counted:
+                break
+            counted = after
+        return {
+            key: {"counter": counted[key], "recount": recounted[key]}
+            for key in counted if counted[key] != recounted[key]
+        }
@@ -0,0 +1,161 @@
+import heapq
+import random
+import threading
+import time
+from datetime import datetime
+from itertools import count
+
+STEP_SECONDS = 30.0
+TICK_SECONDS = 1.0
+BATCH_SIZE = 1000
+
+FINAL_STATUSES = ("completed", "cancelled")
+
+
+def advance_status(status_info):
+    """Move one booking status a simulated step forward. Returns True once completed."""
+    status_info["progress"] += random.randint(5, 15)
+    status_info["lastUpdated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Update status based on progress
+    if status_info["progress"] >= 100:
+        status_info["status"] = "completed"
+        status_info["eta"] = "Service completed"
+        return True
+    elif status_info["progress"] >= 70:
+        status_info["status"] = "in-progress"
+        status_info["eta"] = "15 minutes remaining"
+    elif status_info["progress"] >= 40:
+        status_info["status"] = "en-route"
+        # Simulate moving closer
+        if status_info.get("providerLocation"):
+            status_info["providerLocation"]["lat"] += (random.random() - 0.5) * 0.001
+            status_info["providerLocation"]["lng"] += (random.random() - 0.5) * 0.001
+        status_info["eta"] = "20 minutes"
+    return False
+
+
+class StatusEngine:
+    """Advances active booking statuses from a priority queue of due times.
+
+    Only bookings that can still change are queued, so a tick costs time in
+    proportion to the bookings due, never to every booking ever made.
+    Finished, cancelled and rescheduled entries are dropped lazily when they
+    reach the top of the queue. ``should_run`` lets several processes share
+    one set of bookings with only one of them ticking. ``lock_for`` returns
+    the lock guarding one booking; each step holds it so request threads
+    editing the same booking never interleave with the engine. Never call
+    into the engine while holding such a lock.
+    """
+
+    def __init__(self, booking_statuses, on_complete=None, on_change=None, step_seconds=STEP_SECONDS,
+                 tick_seconds=TICK_SECONDS, batch_size=BATCH_SIZE, clock=time.monotonic, should_run=None,
+                 lock_for=None):
+        self.booking_statuses = booking_statuses
+        self.on_complete = on_complete
+        self.on_change = on_change
+        self.step_seconds = step_seconds
+        self.tick_seconds = tick_seconds
+        self.batch_size = batch_size
+        self.clock = clock
+        self.should_run = should_run
+        self.lock_for = lock_for
+        self._queue = []  # (due, seq, booking_id)
+        self._active = {}  # booking_id: (seq, due) of its live queue entry
+        self._seq = count()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._active)
+
+    def __contains__(self, booking_id):
+        return booking_id in self._active
+
+    def schedule(self, booking_id, delay=None):
+        with self._lock:
+            self._push(booking_id, self.clock() + (self.step_seconds if delay is None else delay))
+
+    def cancel(self, booking_id):
+        with self._lock:
+            self._active.pop(booking_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._active.clear()
+            self._queue.clear()
+
+    def tick(self, now=None):
+        """Advance up to ``batch_size`` due bookings. Returns how many moved."""
+        now = self.clock() if now is None else now
+        advanced = 0
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now and advanced < self.batch_size:
+                due, seq, booking_id = heapq.heappop(self._queue)
+                if self._active.get(booking_id) != (seq, due):
+                    continue
+                self._step(booking_id, now)
+                advanced += 1
+        return advanced
+
+    def advance_all(self):
+        """Step every active booking once, regardless of when it is due."""
+        with self._lock:
+            booking_ids = list(self._active)
+            now = self.clock()
+            for booking_id in booking_ids:
+                self._step(booking_id, now)
+        return len(booking_ids)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.tick_seconds):
+            if self.should_run is not None and not self.should_run():
+                continue
+            # Keep draining while full batches come back so a backlog catches up
+            while self.tick() == self.batch_size:
+                pass
+
+    def _step(self, booking_id, now):
+        if self.lock_for is None:
+            self._advance(booking_id, now)
+            return
+        with self.lock_for(booking_id):
+            self._advance(booking_id, now)
+
+    def _advance(self, booking_id, now):
+        status_info = self.booking_statuses.get(booking_id)
+        if status_info is None or status_info["status"] in FINAL_STATUSES:
+            self._active.pop(booking_id, None)
+            return
+        completed = advance_status(status_info)
+        if self.on_change:
+            self.on_change(booking_id, status_info)
+        if completed:
+            self._active.pop(booking_id, None)
+            if self.on_complete:
+                self.on_complete(booking_id)
+            return
+        self._push(booking_id, now + self.step_seconds)
+
+    def _push(self, booking_id, due):
+        seq = next(self._seq)
+        self._active[booking_id] = (seq, due)
+        heapq.heappush(self._queue, (due, seq, booking_id))
+        # Rebuild once stale entries outnumber live ones
+        if len(self._queue) > 2 * len(self._active) + 64:
+            self._queue = [(due, seq, booking_id) for booking_id, (seq, due) in self._active.items()]
+            heapq.heapify(self._queue)
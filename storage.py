@@ -0,0 +1,521 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from records import to_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process leads
+    fcntl = None
+
+COMMIT_BATCH_SIZE = 200
+COMMIT_INTERVAL_SECONDS = 0.05
+CHANGE_LOG_SIZE = 100_000
+
+
+def open_storage(url):
+    """Build a storage backend from ``memory`` or ``sqlite:///path/to/file.db``.
+
+    SQLite URLs accept ``?shared=1`` for multi-process deployments and
+    ``?batch_size=N`` to tune commit batching.
+    """
+    if not url or url == "memory":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        path, options = _sqlite_options(url)
+        shared = options.get("shared") in ("1", "true")
+        # Other processes only see committed writes, so shared mode commits each one
+        batch_size = int(options.get("batch_size", 1 if shared else COMMIT_BATCH_SIZE))
+        return SQLiteStorage(path, batch_size=batch_size, shared=shared)
+    raise ValueError(f"Unknown storage backend {url!r}")
+
+
+def is_shared(url):
+    """True if the backend ``url`` names can be used by several processes at once."""
+    return bool(url) and url.startswith("sqlite:///") and _sqlite_options(url)[1].get("shared") in ("1", "true")
+
+
+def _sqlite_options(url):
+    path, _, query = url[len("sqlite:///"):].partition("?")
+    return path, {key: values[-1] for key, values in parse_qs(query).items()}
+
+
+class MemoryStorage:
+    """Keeps records in process memory only. Nothing survives a restart."""
+
+    durable = False
+    shared = False
+
+    def __init__(self):
+        self._providers = {}
+        self._users = {}
+        self._bookings = {}
+        self._statuses = {}
+        self._tracking = {}
+        self._sequences = {}
+        self._sequence_lock = threading.Lock()
+
+    def next_value(self, name, start=1, count=1):
+        with self._sequence_lock:
+            value = max(self._sequences.get(name, 0) + 1, start)
+            self._sequences[name] = value + count - 1
+            return value
+
+    def last_change(self):
+        return 0
+
+    def changes_since(self, seq):
+        return seq, []
+
+    def try_lead(self):
+        return True
+
+    def claim_emails(self, claims):
+        # One process: registered_users.setdefault already arbitrates
+        return {email for email, _ in claims}
+
+    def claim_email(self, email, claim):
+        return True
+
+    def release_email(self, email, claim):
+        pass
+
+    def seed_providers(self, providers):
+        if self._providers:
+            return False
+        for provider in providers:
+            self._providers[provider["id"]] = provider
+        return True
+
+    def load_providers(self):
+        return list(self._providers.values())
+
+    def load_users(self):
+        return list(self._users.values())
+
+    def load_bookings(self):
+        """Return ``(booking, status_info)`` pairs in creation order."""
+        return [(booking, self._statuses.get(booking_id)) for booking_id, booking in self._bookings.items()]
+
+    def save_provider(self, provider):
+        self._providers[provider["id"]] = provider
+
+    def save_user(self, user):
+        self._users[user["email"]] = user
+
+    def save_providers(self, providers):
+        for provider in providers:
+            self.save_provider(provider)
+
+    def save_users(self, users):
+        for user in users:
+            self.save_user(user)
+
+    def save_booking(self, booking, status_info=None):
+        self._bookings[booking["id"]] = booking
+        self._tracking[booking["trackingId"]] = booking["id"]
+        if status_info is not None:
+            self._statuses[booking["id"]] = status_info
+
+    def save_status(self, booking_id, status_info):
+        self._statuses[booking_id] = status_info
+
+    def get_booking(self, booking_id):
+        return self._bookings.get(booking_id)
+
+    def get_booking_by_tracking_id(self, tracking_id):
+        return self._bookings.get(self._tracking.get(tracking_id))
+
+    def clear_bookings(self):
+        self._bookings.clear()
+        self._statuses.clear()
+        self._tracking.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    """SQLite backend in WAL mode with batched commits.
+
+    Writes are committed every ``batch_size`` statements or every
+    ``commit_interval`` seconds, whichever comes first, so a crash can lose
+    at most that window. Call ``flush`` where a write must be durable now.
+
+    With ``shared=True`` several processes use one database file: every write
+    also appends to a change log that the other processes replay through
+    ``changes_since``, and ``try_lead`` elects one process for background work.
+    """
+
+    durable = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS providers (
+            id INTEGER PRIMARY KEY,
+            category TEXT,
+            location TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS providers_category_location ON providers (category, location);
+        CREATE INDEX IF NOT EXISTS providers_location ON providers (location);
+
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            user_type TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS bookings (
+            seq INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            tracking_id TEXT NOT NULL UNIQUE,
+            provider_id INTEGER,
+            status TEXT,
+            data TEXT NOT NULL,
+            status_info TEXT
+        );
+        CREATE INDEX IF NOT EXISTS bookings_provider_id ON bookings (provider_id);
+
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS slots (
+            provider_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            booking_id TEXT NOT NULL,
+            PRIMARY KEY (provider_id, day, slot)
+        );
+
+        CREATE TABLE IF NOT EXISTS emails (
+            email TEXT PRIMARY KEY,
+            claim TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            origin TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            data TEXT
+        );
+    """
+
+    def __init__(self, path, batch_size=COMMIT_BATCH_SIZE, commit_interval=COMMIT_INTERVAL_SECONDS, shared=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.shared = shared
+        self.origin = uuid.uuid4().hex
+        self._lead_file = None
+        # One shared connection; sqlite3 keeps a prepared statement per SQL string
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level="DEFERRED",
+                                     cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._first_pending = None
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def seed_providers(self, providers):
+        """Insert ``providers`` if the table is empty. Returns True if this call seeded it."""
+        with self._lock:
+            self._commit()
+            # IMMEDIATE makes concurrent starters wait here rather than seed twice
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM providers LIMIT 1").fetchone():
+                    self._conn.rollback()
+                    return False
+                self._conn.executemany(
+                    "INSERT INTO providers (id, category, location, data) VALUES (?, ?, ?, ?)",
+                    ((p["id"], p.get("category"), p.get("location"), _dumps(p)) for p in providers)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return True
+
+    def load_providers(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM providers ORDER BY id").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def load_users(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM users").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def load_bookings(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data, status_info FROM bookings ORDER BY seq").fetchall()
+        return [(json.loads(data), json.loads(status) if status else None) for data, status in rows]
+
+    def save_provider(self, provider):
+        data = _dumps(provider)
+        self._write(
+            "INSERT INTO providers (id, category, location, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET category = excluded.category, "
+            "location = excluded.location, data = excluded.data",
+            (provider["id"], provider.get("category"), provider.get("location"), data),
+            ("provider", data)
+        )
+
+    def save_user(self, user):
+        data = _dumps(user)
+        self._write(
+            "INSERT INTO users (email, id, user_type, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET id = excluded.id, "
+            "user_type = excluded.user_type, data = excluded.data",
+            (user["email"], user["id"], user["userType"], data),
+            ("user", data)
+        )
+
+    def save_providers(self, providers):
+        """Upsert a batch of providers in one transaction."""
+        rows = [(p["id"], p.get("category"), p.get("location"), _dumps(p)) for p in providers]
+        self._write_many(
+            "INSERT INTO providers (id, category, location, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET category = excluded.category, "
+            "location = excluded.location, data = excluded.data",
+            rows, [("provider", data) for *_, data in rows]
+        )
+
+    def save_users(self, users):
+        """Upsert a batch of users in one transaction."""
+        rows = [(u["email"], u["id"], u["userType"], _dumps(u)) for u in users]
+        self._write_many(
+            "INSERT INTO users (email, id, user_type, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET id = excluded.id, "
+            "user_type = excluded.user_type, data = excluded.data",
+            rows, [("user", data) for *_, data in rows]
+        )
+
+    def save_booking(self, booking, status_info=None):
+        data = _dumps(booking)
+        status = _dumps(status_info) if status_info is not None else None
+        self._write(
+            "INSERT INTO bookings (id, tracking_id, provider_id, status, data, status_info) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET status = excluded.status, data = excluded.data, "
+            "status_info = COALESCE(excluded.status_info, bookings.status_info)",
+            (booking["id"], booking["trackingId"], booking.get("providerId"), booking.get("status"), data, status),
+            ("booking", f'{{"booking":{data},"statusInfo":{status or "null"}}}')
+        )
+
+    def save_status(self, booking_id, status_info):
+        status = _dumps(status_info)
+        self._write(
+            "UPDATE bookings SET status_info = ? WHERE id = ?", (status, booking_id),
+            ("status", f'{{"bookingId":{_dumps(booking_id)},"statusInfo":{status}}}')
+        )
+
+    def next_value(self, name, start=1, count=1):
+        """Atomically allocate the next value of a named sequence, shared by all processes.
+
+        ``count`` reserves that many consecutive values; the first is returned.
+        """
+        with self._lock:
+            self._commit()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO sequences (name, value) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = MAX(value + ?, excluded.value)",
+                    (name, start + count - 1, count)
+                )
+                value, = self._conn.execute("SELECT value FROM sequences WHERE name = ?", (name,)).fetchone()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return value - count + 1
+
+    def claim_slot(self, provider_id, day, slot, booking_id):
+        """Atomically take a provider's time slot across processes. False if another booking holds it."""
+        with self._lock:
+            self._commit()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO slots (provider_id, day, slot, booking_id) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT DO NOTHING",
+                    (provider_id, day, slot, booking_id)
+                )
+                holder, = self._conn.execute(
+                    "SELECT booking_id FROM slots WHERE provider_id = ? AND day = ? AND slot = ?",
+                    (provider_id, day, slot)
+                ).fetchone()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return holder == booking_id
+
+    def claim_emails(self, claims):
+        """Atomically take login emails across processes, for ``(email, claim)`` pairs.
+
+        ``claim`` is any token unique to the caller. Returns the emails this
+        call got; the rest are held by another claim or an existing user.
+        """
+        if not claims:
+            return set()
+        with self._lock:
+            self._commit()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Users saved before the emails table existed hold their email by their id
+                self._conn.executemany(
+                    "INSERT INTO emails (email, claim) "
+                    "SELECT ?, COALESCE((SELECT id FROM users WHERE email = ?), ?) WHERE true "
+                    "ON CONFLICT DO NOTHING",
+                    ((email, email, claim) for email, claim in claims)
+                )
+                claimed = {
+                    email for email, claim in claims
+                    if self._conn.execute("SELECT claim FROM emails WHERE email = ?", (email,)).fetchone()[0] == claim
+                }
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return claimed
+
+    def claim_email(self, email, claim):
+        """Take one login email across processes. False if another registration or user holds it."""
+        return email in self.claim_emails([(email, claim)])
+
+    def release_email(self, email, claim):
+        self._write("DELETE FROM emails WHERE email = ? AND claim = ?", (email, claim))
+
+    def release_slot(self, provider_id, day, slot, booking_id):
+        self._write(
+            "DELETE FROM slots WHERE provider_id = ? AND day = ? AND slot = ? AND booking_id = ?",
+            (provider_id, day, slot, booking_id)
+        )
+
+    def last_change(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def changes_since(self, seq):
+        """Return ``(last_seq, [(kind, record), ...])`` for other processes' writes after ``seq``.
+
+        ``[("reload", None)]`` means the log no longer reaches back to ``seq``
+        and the caller has to reload everything.
+        """
+        if not self.shared:
+            return seq, []
+        with self._lock:
+            first = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            if first is not None and first > seq + 1:
+                last = self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+                return last, [("reload", None)]
+            rows = self._conn.execute(
+                "SELECT seq, origin, kind, data FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        changes = [(kind, json.loads(data) if data else None) for _, origin, kind, data in rows
+                   if origin != self.origin]
+        return (rows[-1][0] if rows else seq), changes
+
+    def try_lead(self):
+        """Hold an advisory lock next to the database; True for exactly one process at a time."""
+        if not self.shared or fcntl is None:
+            return True
+        if self._lead_file is None:
+            self._lead_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(self._lead_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def get_booking(self, booking_id):
+        return self._fetch_booking("SELECT data FROM bookings WHERE id = ?", booking_id)
+
+    def get_booking_by_tracking_id(self, tracking_id):
+        return self._fetch_booking("SELECT data FROM bookings WHERE tracking_id = ?", tracking_id)
+
+    def clear_bookings(self):
+        self._write("DELETE FROM slots", ())
+        self._write("DELETE FROM bookings", (), ("clear", None))
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self._conn.close()
+
+    def _fetch_booking(self, sql, key):
+        with self._lock:
+            row = self._conn.execute(sql, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, sql, params, change=None):
+        with self._lock:
+            self._conn.execute(sql, params)
+            if self.shared and change is not None:
+                cursor = self._conn.execute(
+                    "INSERT INTO changes (origin, kind, data) VALUES (?, ?, ?)", (self.origin, *change)
+                )
+                if cursor.lastrowid % 1000 == 0:
+                    self._conn.execute("DELETE FROM changes WHERE seq <= ?", (cursor.lastrowid - CHANGE_LOG_SIZE,))
+            self._pending += 1
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+            if self._pending >= self.batch_size:
+                self._commit()
+
+    def _write_many(self, sql, rows, changes):
+        # Commits straight away: a batch is already as large as a commit batch gets
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(sql, rows)
+            if self.shared:
+                self._conn.executemany("INSERT INTO changes (origin, kind, data) VALUES (?, ?, ?)",
+                                       ((self.origin, *change) for change in changes))
+                last, = self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+                self._conn.execute("DELETE FROM changes WHERE seq <= ?", (last - CHANGE_LOG_SIZE,))
+            self._pending += 1
+            self._commit()
+
+    def _commit(self):
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+            self._first_pending = None
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.commit_interval):
+            with self._lock:
+                if self._first_pending is not None and time.monotonic() - self._first_pending >= self.commit_interval:
+                    self._commit()
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=to_json)
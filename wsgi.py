@@ -0,0 +1,16 @@
+"""WSGI entry point for production servers.
+
+    SERVICEHUB_STORAGE="sqlite:///servicehub.db?shared=1" gunicorn -w 4 -b 0.0.0.0:8000 wsgi:application
+
+Every worker process imports this module, loads the shared database and
+starts its own status engine; only the worker holding the lead lock ticks.
+The others follow its changes from a background thread as well as before
+each request, so live tracking streams on any worker keep moving.
+Do not use ``--preload``: the SQLite connection and background threads must
+be created after the fork.
+"""
+from app import app, start_sync, status_engine
+
+application = app
+status_engine.start()
+start_sync()